@@ -39,7 +39,7 @@
 #         if is_user_exists(username, email):
 #             st.error("Username or email already exists!")
 #         else:
-#             success = save_user_to_db(username, email, password)
+#             success = auth.signup(username, email, password)  # hashed on the auth worker pool
 #             if success:
 #                 st.success("Signup successful! You can now log in.")
 #             else:
@@ -53,7 +53,7 @@
 
 #     if st.button("Reset Password"):
 #         if is_user_exists(email=email):
-#             update_user_password(email, new_password, by_email=True)
+#             auth.reset_password(email, new_password, by_email=True)
 #             st.success("Password updated successfully!")
             
 #         else:
@@ -96,17 +96,29 @@
 
 ########################################################
 import streamlit as st
-from database import save_user_to_db, validate_login, is_user_exists, update_user_password
-from visualization import run_visualization_dashboard
-from recommendation import run_recommendation_dashboard
+from database import init_db, is_user_exists
+from auth import get_auth_service
+import instrumentation
 
 st.set_page_config(page_title="D-Mart Analytics", layout="wide")
 
+# Create the users table (and switch the file to WAL) once per server process
+st.cache_resource(init_db)()
+
 # Session management (Not strictly necessary anymore, just for handling login state if needed)
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 if "username" not in st.session_state:
     st.session_state.username = None
+if "auth_token" not in st.session_state:
+    st.session_state.auth_token = None
+
+# Reruns trust the session token instead of re-checking the password; an expired token logs out
+auth = get_auth_service()
+if st.session_state.auth_token and auth.session_user(st.session_state.auth_token) is None:
+    st.session_state.logged_in = False
+    st.session_state.username = None
+    st.session_state.auth_token = None
 
 # Login form
 def login_page():
@@ -115,11 +127,13 @@ def login_page():
     password = st.text_input("Password", type="password", key="login_password")
 
     if st.button("Login"):
-        user = validate_login(username_or_email, password)
-        if user:
+        # Password hashing runs on the auth worker pool, not this script thread
+        token = auth.login(username_or_email, password)
+        if token:
             st.session_state.logged_in = True
-            st.session_state.username = user[0]  # Store username in session
-            st.success(f"Welcome {user[0]}!")
+            st.session_state.auth_token = token
+            st.session_state.username = auth.session_user(token)  # Store username in session
+            st.success(f"Welcome {st.session_state.username}!")
         else:
             st.error("Invalid username/email or password!")
 
@@ -134,7 +148,7 @@ def signup_page():
         if is_user_exists(username, email):
             st.error("Username or email already exists!")
         else:
-            success = save_user_to_db(username, email, password)
+            success = auth.signup(username, email, password)  # hashed on the auth worker pool
             if success:
                 st.success("Signup successful! You can now log in.")
             else:
@@ -148,20 +162,48 @@ def reset_password_page():
 
     if st.button("Reset Password"):
         if is_user_exists(email=email):
-            update_user_password(email, new_password, by_email=True)
+            auth.reset_password(email, new_password, by_email=True)
             st.success("Password updated successfully!")
         else:
             st.error("Email not found!")
 
+# Stage timings recorded by instrumentation.py; only offered when DMART_PROFILE is set
+def performance_panel():
+    import pandas as pd
+
+    st.title("⏱ Performance")
+    if st.button("Clear timings"):
+        instrumentation.clear()
+
+    st.subheader("Per stage")
+    st.dataframe(pd.DataFrame(instrumentation.summary()), use_container_width=True)
+
+    st.subheader("Recent calls")
+    recent = pd.DataFrame(instrumentation.recent())
+    if not recent.empty:
+        recent["at"] = pd.to_datetime(recent["at"], unit="s")
+    st.dataframe(recent, use_container_width=True)
+
 # MAIN DASHBOARD
 def dashboard():
     st.sidebar.title("D-Mart Dashboard")
-    page = st.sidebar.radio("Navigation", ["📊 Overview", "🤝 Product Recommendation"])
+    pages = ["📊 Overview", "🤝 Product Recommendation"]
+    if instrumentation.enabled():
+        pages.append("⏱ Performance")
+    page = st.sidebar.radio("Navigation", pages)
 
+    # Page modules (and the pandas/plotly/sklearn stacks behind them) load on first visit,
+    # so the login, signup and reset pages start with only streamlit and sqlite
     if page == "📊 Overview":
-        run_visualization_dashboard()
+        from visualization import run_visualization_dashboard
+        with instrumentation.stage("page:overview"):
+            run_visualization_dashboard()
     elif page == "🤝 Product Recommendation":
-        run_recommendation_dashboard()
+        from recommendation import run_recommendation_dashboard
+        with instrumentation.stage("page:recommendation"):
+            run_recommendation_dashboard()
+    elif page == "⏱ Performance":
+        performance_panel()
 
 # MAIN APP NAVIGATION
 def main_app():
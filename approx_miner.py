@@ -0,0 +1,147 @@
+import threading
+
+import numpy as np
+
+from miner import generate_rules, mine_frequent_itemsets
+
+
+Z = 1.96  # two-sided 95% bounds
+
+BOUND_COLUMNS = ["support_low", "support_high", "confidence_low", "confidence_high", "lift_low", "lift_high"]
+
+
+# Rules mined from the first `sample_size` baskets of `order` (a fixed permutation, so every
+# larger sample contains the smaller ones) with z-score bounds on support, confidence and lift.
+# The sample is mined a margin below min_support, so an itemset whose true support is
+# min_support is still found with ~97.5% probability; likewise rules are kept while the upper
+# bound of their lift reaches min_lift. With the whole matrix the result is exact and the
+# bounds collapse onto the estimates.
+def mine_sample(matrix, items, sample_size, min_support=0.01, order=None, z=Z, min_lift=1.0):
+    n_baskets = matrix.shape[0]
+    n = min(sample_size, n_baskets)
+    exact = n >= n_baskets
+    if exact:
+        sample = matrix
+    else:
+        order = np.arange(n_baskets) if order is None else order
+        sample = matrix[np.sort(order[:n])]
+
+    # Finite population correction: the bounds shrink to nothing as the sample nears every basket
+    fpc = 0.0 if exact else np.sqrt((n_baskets - n) / max(n_baskets - 1, 1))
+    margin = z * np.sqrt(min_support * (1 - min_support) / max(n, 1)) * fpc
+    mined_support = max(min_support - margin, 1 / max(n, 1))
+    frequent = mine_frequent_itemsets(sample, items, mined_support)
+    # Widest the lift bound can be for rules over itemsets this frequent (see _add_bounds), so
+    # the cut inside generate_rules keeps every rule whose upper bound can still reach min_lift
+    slack = np.exp(-z * np.sqrt(2 / max(mined_support * n, 1)) * fpc)
+    rules = generate_rules(frequent, metric="lift", min_threshold=min_lift * slack)
+    _add_bounds(rules, n, z, fpc)
+    if not exact:
+        rules = rules[rules["lift_high"] >= min_lift].reset_index(drop=True)
+    return {"rules": rules, "sample_size": n, "baskets": n_baskets, "exact": exact, "min_support": min_support,
+            "min_lift": min_lift}
+
+
+def _add_bounds(rules, n, z, fpc):
+    support = rules["support"].to_numpy(dtype=float)
+    antecedent = rules["antecedent support"].to_numpy(dtype=float)
+    consequent = rules["consequent support"].to_numpy(dtype=float)
+    confidence = rules["confidence"].to_numpy(dtype=float)
+
+    support_se = np.sqrt(support * (1 - support) / n) * fpc
+    # Confidence is a proportion over the baskets holding the antecedent
+    confidence_se = np.sqrt(confidence * (1 - confidence) / np.maximum(antecedent * n, 1)) * fpc
+    # Delta method on log(lift) = log(confidence) - log(consequent support)
+    log_lift_se = np.sqrt((1 - confidence) / np.maximum(support * n, 1)
+                          + (1 - consequent) / np.maximum(consequent * n, 1)) * fpc
+
+    rules["support_low"] = np.clip(support - z * support_se, 0, 1)
+    rules["support_high"] = np.clip(support + z * support_se, 0, 1)
+    rules["confidence_low"] = np.clip(confidence - z * confidence_se, 0, 1)
+    rules["confidence_high"] = np.clip(confidence + z * confidence_se, 0, 1)
+    rules["lift_low"] = rules["lift"] * np.exp(-z * log_lift_se)
+    rules["lift_high"] = rules["lift"] * np.exp(z * log_lift_se)
+
+
+# Rules of a mine_sample result meeting the thresholds on their estimates, strongest lift first.
+# "certain" marks rules whose lower bounds clear every threshold as well.
+# Thresholds below the result's own min_support / min_lift can't be honoured and are raised to them.
+def filter_rules(result, min_support=None, min_confidence=0.0, min_lift=1.0):
+    rules = result["rules"]
+    min_support = max(min_support or 0.0, result["min_support"])
+    min_lift = max(min_lift, result["min_lift"])
+    keep = (rules["support"] >= min_support) & (rules["confidence"] >= min_confidence) & (rules["lift"] >= min_lift)
+    selected = rules[keep].copy()
+    selected["certain"] = ((selected["support_low"] >= min_support) & (selected["confidence_low"] >= min_confidence)
+                           & (selected["lift_low"] >= min_lift))
+    return selected.sort_values("lift", ascending=False, kind="mergesort").reset_index(drop=True)
+
+
+# Sample sizes first_sample, first_sample * growth, ... ending with every basket
+def sample_schedule(n_baskets, first_sample=10_000, growth=4):
+    sizes = []
+    size = first_sample
+    while size < n_baskets:
+        sizes.append(size)
+        size *= growth
+    return sizes + [n_baskets]
+
+
+# Mines a small sample, then larger nested samples, in a background thread until the whole
+# basket history has been mined exactly. result() is always the latest stage (None until the
+# first one is in), so a page can filter it on every slider change without waiting for the full mine.
+class ProgressiveMiner:
+    def __init__(self, matrix, items, min_support=0.01, min_lift=1.0, first_sample=10_000, growth=4, seed=42, z=Z):
+        self.matrix = matrix
+        self.items = items
+        self.min_support = min_support
+        self.min_lift = min_lift
+        self.z = z
+        self.order = np.random.default_rng(seed).permutation(matrix.shape[0])
+        self.schedule = sample_schedule(matrix.shape[0], first_sample, growth)
+        self.stage = 0
+        self.error = None
+        self._result = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _mine(self, size):
+        return mine_sample(self.matrix, self.items, size, self.min_support, self.order, self.z, self.min_lift)
+
+    # Every stage, the first included, runs in the background so start() returns at once
+    def start(self):
+        if self.stage < len(self.schedule) and self._thread is None:
+            self._thread = threading.Thread(target=self._refine, daemon=True)
+            self._thread.start()
+        return self
+
+    def _refine(self):
+        try:
+            for stage, size in enumerate(self.schedule[self.stage:], self.stage + 1):
+                if self._stop.is_set():
+                    return
+                self._publish(self._mine(size), stage)
+        except Exception as e:
+            self.error = e
+
+    def _publish(self, result, stage):
+        with self._lock:
+            self._result = result
+            self.stage = stage
+
+    def result(self):
+        with self._lock:
+            return self._result
+
+    def done(self):
+        return self.stage == len(self.schedule)
+
+    # Block until the exact result is in (or timeout seconds pass); returns done()
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.done()
+
+    def stop(self):
+        self._stop.set()
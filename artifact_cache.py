@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".artifact_cache")
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+
+# (path, size, mtime) -> sha256, so an unchanged input file is only hashed once per process
+_digests = {}
+
+
+# Content hash of an input file
+def file_digest(path):
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    digest = _digests.get(memo_key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = _digests[memo_key] = h.hexdigest()
+    return digest
+
+
+# Cache key for an artifact: its name, the hashes of the files it was built from and its parameters
+def artifact_key(name, paths, params):
+    payload = {
+        "name": name,
+        "inputs": [file_digest(path) for path in paths],
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _artifact_path(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.pkl")
+
+
+# (True, value) on a hit, (False, None) on a miss; a hit refreshes the entry's LRU position
+def load_artifact(key, cache_dir=CACHE_DIR):
+    path = _artifact_path(key, cache_dir)
+    try:
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+    except FileNotFoundError:
+        return False, None
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        # Truncated or stale (e.g. written by an older library version): treat as a miss
+        _remove(path)
+        return False, None
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass  # evicted by another process since we read it; the value is still good
+    return True, value
+
+
+# Write an artifact atomically, then evict least recently used entries beyond max_bytes
+def save_artifact(key, value, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _artifact_path(key, cache_dir))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    evict(cache_dir, max_bytes, keep=key)
+
+
+# Delete a cache file that another process (a concurrent evict or clear) may already have removed
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Drop the least recently used artifacts until the cache fits in max_bytes
+def evict(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, keep=None):
+    entries = []
+    with os.scandir(cache_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".pkl"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    keep_path = _artifact_path(keep, cache_dir) if keep else None
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep_path:
+            continue
+        _remove(path)
+        total -= size
+
+
+# Load an artifact built from `paths` with `params`, computing and storing it on a miss
+def cached_artifact(name, paths, params, compute, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+    key = artifact_key(name, paths, params)
+    hit, value = load_artifact(key, cache_dir)
+    if hit:
+        return value
+    value = compute()
+    save_artifact(key, value, cache_dir, max_bytes)
+    return value
+
+
+# Remove every cached artifact
+def clear_artifacts(cache_dir=CACHE_DIR):
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        if name.endswith((".pkl", ".tmp")):
+            _remove(os.path.join(cache_dir, name))
@@ -0,0 +1,90 @@
+import json
+import os
+import pickle
+import shutil
+from datetime import datetime, timezone
+
+
+ARTIFACT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+LATEST_FILE = "LATEST"
+MANIFEST_FILE = "manifest.json"
+
+# (version, name) -> artifact, so a page rerun doesn't unpickle the same file again
+_loaded = {}
+
+
+def new_version():
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+# Write one pipeline run as artifacts/<version>/ and point LATEST at it once everything is on disk
+def publish_artifacts(artifacts, manifest, root=ARTIFACT_ROOT, keep=3):
+    version = new_version()
+    staging = os.path.join(root, f".{version}.partial")
+    os.makedirs(staging)
+    try:
+        for name, value in artifacts.items():
+            with open(os.path.join(staging, f"{name}.pkl"), "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        manifest = dict(manifest, version=version, artifacts=sorted(artifacts))
+        with open(os.path.join(staging, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(staging, os.path.join(root, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    latest_tmp = os.path.join(root, f".{LATEST_FILE}.tmp")
+    with open(latest_tmp, "w") as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(root, LATEST_FILE))
+    _prune(root, keep)
+    return version
+
+
+# Drop all but the newest `keep` versions
+def _prune(root, keep):
+    versions = list_versions(root)
+    for version in versions[:-keep] if keep else []:
+        shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+
+# Published versions, oldest first
+def list_versions(root=ARTIFACT_ROOT):
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if not name.startswith(".") and os.path.isfile(os.path.join(root, name, MANIFEST_FILE))
+    )
+
+
+def latest_version(root=ARTIFACT_ROOT):
+    try:
+        with open(os.path.join(root, LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(version=None, root=ARTIFACT_ROOT):
+    version = version or latest_version(root)
+    if version is None:
+        return None
+    with open(os.path.join(root, version, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+# A published artifact from the latest (or given) version, or None if the pipeline hasn't produced it
+def load_published(name, version=None, root=ARTIFACT_ROOT):
+    version = version or latest_version(root)
+    if version is None:
+        return None
+    key = (os.path.abspath(root), version, name)
+    if key not in _loaded:
+        try:
+            with open(os.path.join(root, version, f"{name}.pkl"), "rb") as f:
+                _loaded[key] = pickle.load(f)
+        except FileNotFoundError:
+            return None
+    return _loaded[key]
@@ -0,0 +1,113 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from database import save_user_to_db, update_user_password, validate_login
+from passwords import hash_password
+
+
+# Bounded map of session token -> username; entries expire after ttl seconds and the
+# least recently used are dropped beyond max_entries
+class SessionCache:
+    def __init__(self, ttl=30 * 60, max_entries=10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def issue(self, username):
+        token = secrets.token_urlsafe(32)
+        with self.lock:
+            self.entries[token] = (username, time.monotonic() + self.ttl)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return token
+
+    def get(self, token):
+        with self.lock:
+            entry = self.entries.get(token)
+            if entry is None:
+                return None
+            username, expires = entry
+            if expires < time.monotonic():
+                del self.entries[token]
+                return None
+            self.entries.move_to_end(token)
+            return username
+
+    def revoke(self, token):
+        with self.lock:
+            self.entries.pop(token, None)
+
+    def purge_expired(self):
+        now = time.monotonic()
+        with self.lock:
+            for token in [t for t, (_, expires) in self.entries.items() if expires < now]:
+                del self.entries[token]
+
+
+# Password checks run on a worker pool (PBKDF2 releases the GIL), so a login costs the
+# Streamlit script thread a wait rather than CPU, and other sessions keep running.
+# A successful login returns a session token; reruns check the token instead of the password.
+class AuthService:
+    def __init__(self, workers=4, session_ttl=30 * 60, max_sessions=10_000):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auth")
+        self.sessions = SessionCache(session_ttl, max_sessions)
+
+    # concurrent.futures.Future resolving to a session token, or None for bad credentials
+    def submit_login(self, username_or_email, password):
+        return self.pool.submit(self._login, username_or_email, password)
+
+    def _login(self, username_or_email, password):
+        user = validate_login(username_or_email, password)
+        if user is None:
+            return None
+        return self.sessions.issue(user[0])
+
+    def login(self, username_or_email, password, timeout=None):
+        return self.submit_login(username_or_email, password).result(timeout)
+
+    async def login_async(self, username_or_email, password):
+        import asyncio  # only async callers pay for importing asyncio
+        return await asyncio.wrap_future(self.submit_login(username_or_email, password))
+
+    # Signups and password resets hash on the pool too; same Future / blocking pairs as login.
+    # signup resolves to False when the username or email is already taken.
+    def submit_signup(self, username, email, password):
+        return self.pool.submit(save_user_to_db, username, email, password)
+
+    def signup(self, username, email, password, timeout=None):
+        return self.submit_signup(username, email, password).result(timeout)
+
+    def submit_reset(self, identifier, new_password, by_email=False):
+        return self.pool.submit(update_user_password, identifier, new_password, by_email)
+
+    def reset_password(self, identifier, new_password, by_email=False, timeout=None):
+        return self.submit_reset(identifier, new_password, by_email).result(timeout)
+
+    # Hash many passwords on the pool, e.g. for database.import_users(users, hasher=service.hash_many)
+    def hash_many(self, passwords):
+        return list(self.pool.map(hash_password, passwords))
+
+    def session_user(self, token):
+        return self.sessions.get(token) if token else None
+
+    def logout(self, token):
+        self.sessions.revoke(token)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+# Process-wide service shared by every Streamlit session
+def get_auth_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AuthService()
+        return _service
@@ -0,0 +1,197 @@
+import hashlib
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from artifact_cache import CACHE_DIR, load_artifact, save_artifact
+from forecasting import ARIMA_ORDER
+
+
+# Rolling-origin (expanding window) evaluation: for every cutoff the model is fitted on the
+# observations before it and scored on the `horizon` observations after it, so no fold ever
+# trains on its own future. Cutoffs are split into fixed-length chains spread over worker
+# processes; inside a chain each fold starts from the previous fold's fit. Every fold is cached
+# under the hash of the data it saw and the first cutoff of its chain, so its result doesn't
+# depend on the worker count and rerunning on unchanged data only computes the missing folds.
+
+FOLD_COLUMNS = ["model", "cutoff", "step", "actual", "forecast", "error"]
+
+
+# Positions where a fold's training window ends: the first after `initial` observations,
+# then every `step`, as long as `horizon` observations follow
+def rolling_origins(n, initial, horizon=1, step=1):
+    return list(range(initial, n - horizon + 1, step))
+
+
+def _fold_key(kind, values, cutoff, horizon, params):
+    h = hashlib.sha256(kind.encode())
+    for array in values:
+        h.update(np.ascontiguousarray(array[:cutoff + horizon]).tobytes())
+    h.update(repr((cutoff, horizon, sorted(params.items()))).encode())
+    return "backtest-" + h.hexdigest()
+
+
+# Runs of chain_length consecutive cutoffs. Fixed-length chains (rather than one per worker)
+# keep every fold's fit sequence, and so its forecast, independent of the worker count.
+def _chains(cutoffs, chain_length):
+    return [list(cutoffs[i:i + chain_length]) for i in range(0, len(cutoffs), chain_length)]
+
+
+def _run_all(fold_run, runs, args, workers):
+    if workers == 1 or len(runs) == 1:
+        return [fold for run in runs for fold in fold_run(run, *args)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(fold_run, runs, *[[arg] * len(runs) for arg in args])
+        return [fold for run in results for fold in run]
+
+
+# ---------------- ARIMA on a monthly series ----------------
+
+# One chain of consecutive ARIMA folds; each fit starts from the previous fold's parameters,
+# which cached folds keep too, so a chain resumes exactly after a cache hit
+def _arima_run(cutoffs, values, horizon, order, cache_dir):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    folds = []
+    start_params = None
+    for cutoff in cutoffs:
+        key = _fold_key("arima", [values], cutoff, horizon, {"order": order, "chain_start": int(cutoffs[0])})
+        hit, fold = load_artifact(key, cache_dir) if cache_dir else (False, None)
+        if not hit:
+            started = time.perf_counter()
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                fit = ARIMA(values[:cutoff], order=order).fit(start_params=start_params)
+            fold = {"cutoff": int(cutoff), "forecast": np.asarray(fit.forecast(steps=horizon), dtype=float),
+                    "params": np.asarray(fit.params), "seconds": time.perf_counter() - started}
+            if cache_dir:
+                save_artifact(key, fold, cache_dir)
+        start_params = fold["params"]
+        folds.append(fold)
+    return folds
+
+
+# Backtest ARIMA on monthly quantity (the series train_arima_model fits).
+# Returns one row per (cutoff, step) with the actual, the forecast and the error.
+# chain_length: folds per warm-started chain; chains start from default parameters and run in parallel.
+def backtest_arima(sales, order=ARIMA_ORDER, horizon=2, initial=12, step=1, chain_length=4, workers=None,
+                   cache_dir=CACHE_DIR):
+    monthly = sales.resample('ME', on='Date')['Quantity'].sum()
+    values = monthly.to_numpy(dtype=float)
+    cutoffs = rolling_origins(len(values), initial, horizon, step)
+    if not cutoffs:
+        return pd.DataFrame(columns=FOLD_COLUMNS)
+    runs = _chains(cutoffs, chain_length)
+    workers = min(workers or os.cpu_count() or 1, len(runs))
+    folds = _run_all(_arima_run, runs, (values, horizon, tuple(order), cache_dir), workers)
+
+    rows = []
+    for fold in folds:
+        for i, forecast in enumerate(fold["forecast"]):
+            actual = values[fold["cutoff"] + i]
+            rows.append(("arima", monthly.index[fold["cutoff"]], i + 1, actual, forecast, forecast - actual))
+    return pd.DataFrame(rows, columns=FOLD_COLUMNS)
+
+
+# ---------------- hybrid ensemble on feature rows ----------------
+
+# One chain of consecutive hybrid folds: a fit at the first cutoff, then each fold folds the rows
+# since the previous cutoff in with partial_fit instead of retraining on the whole window.
+# A fold's cache key includes the chain's first cutoff, which with the fixed step pins down every
+# partial_fit before it. Cached folds leave no model behind, so a miss after them replays the
+# chain up to that point to get the same fit as an uncached run.
+def _hybrid_run(cutoffs, X, y, horizon, params, cache_dir):
+    from hybrid_model import HybridEnsemble
+
+    def cold_fit(cutoff):
+        model = HybridEnsemble(n_estimators=params["n_estimators"], random_state=params["random_state"],
+                               n_jobs=params["n_jobs"])
+        return model.fit(X[:cutoff], y[:cutoff])
+
+    folds = []
+    model, seen = None, 0
+    for cutoff in cutoffs:
+        start = cutoffs[0] if params["warm_start"] else cutoff
+        # n_jobs only changes how fast the trees are grown, so it stays out of the key
+        key_params = {name: value for name, value in params.items() if name != "n_jobs"}
+        key = _fold_key("hybrid", [X, y], cutoff, horizon, dict(key_params, chain_start=int(start)))
+        hit, fold = load_artifact(key, cache_dir) if cache_dir else (False, None)
+        if not hit:
+            started = time.perf_counter()
+            if model is None or not params["warm_start"]:
+                model, seen = cold_fit(start), start
+            # Catch up on the cutoffs answered from the cache, one partial_fit each as before
+            for step in [c for c in cutoffs if seen < c <= cutoff]:
+                model.partial_fit(X[seen:step], y[seen:step])
+                seen = step
+            fold = {"cutoff": int(cutoff), "forecast": model.predict(X[cutoff:cutoff + horizon]),
+                    "seconds": time.perf_counter() - started}
+            if cache_dir:
+                save_artifact(key, fold, cache_dir)
+        folds.append(fold)
+    return folds
+
+
+# Backtest the hybrid ensemble on rows sorted by time_column (a column or a list, e.g.
+# ["Year", "Month"]): n_folds windows of `horizon` rows after an initial share of the data.
+# There is no default: in file order a fold could train on rows later than the ones it is scored on.
+# Returns one row per fold with MAE/RMSE/MAPE over its window.
+# chain_length: folds per warm-started chain; chains start from a cold fit and run in parallel.
+def backtest_hybrid(df, n_folds=5, initial=0.5, horizon=None, time_column=None, n_estimators=100,
+                    random_state=42, warm_start=True, chain_length=2, workers=None, cache_dir=CACHE_DIR):
+    if time_column is None:
+        raise ValueError("backtest_hybrid needs a time_column to order the rows by")
+    columns = [time_column] if isinstance(time_column, str) else list(time_column)
+    missing = [column for column in columns if column not in df.columns]
+    if missing:
+        raise ValueError(f"time column(s) {missing} not in the data")
+    df = df.sort_values(time_column, kind="mergesort")
+    X = df.drop(columns=["SalesAmount", "Name"], errors='ignore').to_numpy(dtype=float)
+    y = df["SalesAmount"].to_numpy(dtype=float)
+    start = int(len(y) * initial)
+    horizon = horizon or max((len(y) - start) // n_folds, 1)
+    cutoffs = rolling_origins(len(y), start, horizon, horizon)[:n_folds]
+    if not cutoffs:
+        return pd.DataFrame(columns=["model", "cutoff", "rows", "mae", "rmse", "mape"])
+
+    workers = workers or os.cpu_count() or 1
+    runs = _chains(cutoffs, chain_length if warm_start else 1)
+    workers = min(workers, len(runs))
+    params = {"n_estimators": n_estimators, "random_state": random_state, "warm_start": warm_start,
+              # One core per fold when the folds themselves run in parallel
+              "n_jobs": 1 if workers > 1 else -1}
+    folds = _run_all(_hybrid_run, runs, (X, y, horizon, params, cache_dir), workers)
+
+    rows = []
+    for fold in folds:
+        actual = y[fold["cutoff"]:fold["cutoff"] + horizon]
+        rows.append(dict({"model": "hybrid", "cutoff": fold["cutoff"], "rows": len(actual)},
+                         **_errors(actual, fold["forecast"])))
+    return pd.DataFrame(rows)
+
+
+def _errors(actual, forecast):
+    error = np.asarray(forecast, dtype=float) - np.asarray(actual, dtype=float)
+    nonzero = actual != 0
+    return {
+        "mae": float(np.mean(np.abs(error))),
+        "rmse": float(np.sqrt(np.mean(error ** 2))),
+        # Zero actuals have no percentage error and are left out
+        "mape": float(np.mean(np.abs(error[nonzero] / actual[nonzero])) * 100) if nonzero.any() else float("nan"),
+    }
+
+
+# MAE / RMSE / MAPE / bias per forecast step over every fold of backtest_arima
+def summarize(folds):
+    if folds.empty:
+        return pd.DataFrame(columns=["model", "step", "folds", "mae", "rmse", "mape", "bias"])
+    rows = []
+    for (model, step), group in folds.groupby(["model", "step"]):
+        actual, forecast = group["actual"].to_numpy(), group["forecast"].to_numpy()
+        rows.append(dict({"model": model, "step": step, "folds": len(group)}, **_errors(actual, forecast),
+                         bias=float(np.mean(forecast - actual))))
+    return pd.DataFrame(rows)
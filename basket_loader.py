@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from miner import basket_matrix
+
+
+# Stream the wide basket CSV (Product_0..Product_N, one basket per row) straight into a
+# sparse baskets x products matrix. Only one chunk of raw rows is in memory at a time;
+# product names are interned to integer ids as they are first seen.
+@timed("load_basket_matrix", rows=lambda result: result[0].shape[0])
+def load_basket_matrix(path, chunksize=10_000):
+    vocab = {}
+    indices_parts = []
+    row_sizes = []
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize):
+        indices, sizes = _encode_chunk(chunk.to_numpy(dtype=object), vocab)
+        indices_parts.append(indices)
+        row_sizes.append(sizes)
+
+    indices = np.concatenate(indices_parts) if indices_parts else np.empty(0, dtype=np.int32)
+    indptr = np.zeros(sum(len(sizes) for sizes in row_sizes) + 1, dtype=np.int64)
+    if row_sizes:
+        np.cumsum(np.concatenate(row_sizes), out=indptr[1:])
+    return basket_matrix(indices, indptr, vocab)
+
+
+# Global item ids for one chunk (row-major, duplicates within a basket dropped) and the
+# number of items in each basket
+def _encode_chunk(values, vocab):
+    rows, cols = np.nonzero(pd.notna(values))
+    codes, names = pd.factorize(values[rows, cols])
+
+    # Only the chunk's distinct names go through the Python dict
+    ids = np.fromiter((vocab.setdefault(name, len(vocab)) for name in names), dtype=np.int64, count=len(names))
+    width = max(len(vocab), 1)
+    keys = np.unique(rows.astype(np.int64) * width + ids[codes])
+    return (keys % width).astype(np.int32), np.bincount(keys // width, minlength=len(values))
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+
+METRICS = ("lift", "confidence")
+AGGREGATES = ("max", "sum")
+
+
+# Trie over rule antecedents, items in sorted order; each node lists the rules whose
+# antecedent ends there. Node layout: [children {item: node}, rule rows].
+# Consequents are flattened to item ids (CSR layout) so scoring is a numpy scatter.
+def build_antecedent_trie(rules):
+    root = [{}, []]
+    if rules is None or rules.empty:
+        return {"root": root, "items": [], "item_ids": {}, "indptr": np.zeros(1, dtype=np.int64),
+                "consequent_ids": np.empty(0, dtype=np.int32), "lift": np.empty(0), "confidence": np.empty(0)}
+
+    for row, antecedent in enumerate(rules["antecedents"]):
+        node = root
+        for item in sorted(antecedent):
+            node = node[0].setdefault(item, [{}, []])
+        node[1].append(row)
+
+    items = sorted(set().union(*rules["antecedents"], *rules["consequents"]))
+    item_ids = {item: i for i, item in enumerate(items)}
+    lengths = np.fromiter((len(c) for c in rules["consequents"]), dtype=np.int64, count=len(rules))
+    indptr = np.concatenate([[0], np.cumsum(lengths)])
+    consequent_ids = np.fromiter(
+        (item_ids[item] for consequent in rules["consequents"] for item in consequent),
+        dtype=np.int32, count=int(indptr[-1]),
+    )
+    return {
+        "root": root,
+        "items": items,
+        "item_ids": item_ids,
+        "indptr": indptr,
+        "consequent_ids": consequent_ids,
+        "lift": rules["lift"].to_numpy(dtype=float),
+        "confidence": rules["confidence"].to_numpy(dtype=float),
+    }
+
+
+# Rows of every rule whose antecedent is a subset of the cart; only trie paths made of
+# cart items are walked, so the cost follows the matched rules rather than the rule count
+def matching_rules(trie, cart):
+    cart = sorted(set(cart))
+    position = {item: i for i, item in enumerate(cart)}
+    rows = []
+    stack = [(trie["root"], 0)]
+    while stack:
+        (children, node_rows), start = stack.pop()
+        rows.extend(node_rows)
+        if len(children) < len(cart) - start:
+            for item, child in children.items():
+                i = position.get(item)
+                if i is not None and i >= start:
+                    stack.append((child, i + 1))
+        else:
+            for i in range(start, len(cart)):
+                child = children.get(cart[i])
+                if child is not None:
+                    stack.append((child, i + 1))
+    return rows
+
+
+# Score every consequent of the matched rules and return the best top_n items not already in
+# the cart, with the score and the number/strength of the rules supporting each.
+# metric: rule column the score is built from; aggregate: "max" keeps the strongest rule,
+# "sum" adds up every rule that suggests the item.
+def score_basket(trie, cart, top_n=5, metric="lift", aggregate="max"):
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}")
+    if aggregate not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate '{aggregate}', expected one of {AGGREGATES}")
+
+    in_cart = set(cart)
+    rows = np.asarray(matching_rules(trie, in_cart), dtype=np.int64)
+
+    # Every (rule, consequent item) pair of the matched rules, cart items dropped
+    starts, stops = trie["indptr"][rows], trie["indptr"][rows + 1]
+    lengths = stops - starts
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    ids = trie["consequent_ids"][offsets + np.arange(int(lengths.sum()))]
+    pair_rows = np.repeat(rows, lengths)
+    cart_ids = [trie["item_ids"][item] for item in in_cart if item in trie["item_ids"]]
+    keep = ~np.isin(ids, cart_ids)
+    ids, pair_rows = ids[keep], pair_rows[keep]
+
+    n_items = len(trie["items"])
+    weights = trie[metric][pair_rows]
+    if aggregate == "sum":
+        scores = np.bincount(ids, weights, minlength=n_items)
+    else:
+        scores = np.zeros(n_items)
+        np.maximum.at(scores, ids, weights)
+    counts = np.bincount(ids, minlength=n_items)
+    best_lift = np.zeros(n_items)
+    np.maximum.at(best_lift, ids, trie["lift"][pair_rows])
+    best_confidence = np.zeros(n_items)
+    np.maximum.at(best_confidence, ids, trie["confidence"][pair_rows])
+
+    # Highest score first, then most supporting rules, then name
+    candidates = np.flatnonzero(counts)
+    order = np.lexsort((candidates, -counts[candidates], -scores[candidates]))
+    ranked = candidates[order[:top_n]]
+    return pd.DataFrame({
+        "item": [trie["items"][i] for i in ranked],
+        "score": scores[ranked],
+        "rules": counts[ranked],
+        "lift": best_lift[ranked],
+        "confidence": best_confidence[ranked],
+    })
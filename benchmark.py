@@ -0,0 +1,301 @@
+"""Benchmarks of the hot paths on seeded synthetic data.
+
+    python benchmark.py --rows 10000 100000 1000000 --output bench.json
+    python benchmark.py --rows 100000 --baseline bench.json --tolerance 0.25
+
+For each scale a dataset is generated under --work-dir in the same layout as the real data
+directory (same file names and columns), then every case is timed (best of --repeat) and run
+once more under tracemalloc for its peak allocation. A table goes to stderr as cases finish; the
+JSON report goes to stdout and to --output. With --baseline, the exit status is 1 when a case got slower (or used more
+memory) than the baseline by more than --tolerance.
+
+The page functions in recommendation.py / visualization.py are Streamlit closures, so each case
+runs the code they call:
+    load_baskets       load_apriori_data        basket CSV -> sparse matrix
+    mine_rules         apply_apriori_algorithm
+    rule_index         load_rule_index
+    lookups            get_top_recommendations  (--lookups single-product lookups)
+    fit_arima          train_arima_model
+    fit_hybrid         train_hybrid_model       (first --max-hybrid-rows rows)
+    sales_cube         overview cube build
+    rollups            the overview tabs' roll-ups for one location
+    location_kpis      store comparison tab
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from basket_loader import load_basket_matrix
+from dashboard_metrics import load_catalog, load_location_sales, location_kpis
+from data_store import BASKETS_FILE, DATASETS, read_table
+from forecasting import ARIMA_ORDER, FORECAST_STEPS, fit_arima, fit_hybrid
+from miner import mine_rules
+from product_dim import build_product_dimension
+from rule_index import build_rule_index, indexed_products, lookup_recommendations
+from sales_cube import build_sales_cube, cube_locations, rollup, top_members
+
+
+BASKET_WIDTH = 26  # Product_0 .. Product_25, as in the shipped basket file
+LOCATIONS = ["Mumbai", "Pune", "Nashik", "Nagpur", "Thane", "Aurangabad", "Kolhapur", "Solapur"]
+CATEGORIES = {
+    "Grocery": ["Dry Fruits", "Dals", "Rice", "Masala"],
+    "Beverages": ["Tea", "Coffee", "Juices"],
+    "Personal Care": ["Oral Care", "Hair Care", "Skin Care"],
+    "Home Care": ["Detergents", "Cleaners"],
+    "Stationery": ["Pens", "Pencils"],
+}
+CHUNK_ROWS = 500_000
+
+
+# ---------------- synthetic data ----------------
+
+# Product popularity follows a Zipf-like curve, so a few items are in most baskets like real retail
+def _popularity(n_products, exponent=1.1):
+    weights = 1.0 / np.arange(1, n_products + 1) ** exponent
+    return weights / weights.sum()
+
+
+def generate_catalog(n_products, rng):
+    pairs = [(category, sub) for category, subs in CATEGORIES.items() for sub in subs]
+    picks = rng.integers(0, len(pairs), n_products)
+    price = rng.integers(10, 1000, n_products)
+    return pd.DataFrame({
+        "Sr.No": np.arange(1, n_products + 1),
+        "Name": [f"Product {i:06d}" for i in range(n_products)],
+        "Brand": [f"Brand {i % 250:03d}" for i in range(n_products)],
+        "UnitPrice": price,
+        "DicountPrice": (price * rng.uniform(0.6, 1.0, n_products)).astype(int),
+        "Categoty": [pairs[p][0] for p in picks],
+        "SubCategory": [f"{pairs[p][0]}/{pairs[p][1]}" for p in picks],
+        "Quantity": rng.choice(["100 gm", "500 gm", "1 kg", "1 pc"], n_products),
+    })
+
+
+# Wide basket rows; each product has a partner it is bought with half of the time, so
+# there are rules to find at any scale
+def _basket_chunk(n, names, partner, weights, rng):
+    size = np.clip(rng.geometric(0.25, n), 1, BASKET_WIDTH)
+    ids = rng.choice(len(names), size=(n, BASKET_WIDTH), p=weights)
+    with_partner = rng.random(n) < 0.5
+    ids[with_partner, 1] = partner[ids[with_partner, 0]]
+    values = names[ids]
+    values[np.arange(BASKET_WIDTH)[None, :] >= size[:, None]] = None
+    return pd.DataFrame(values, columns=[f"Product_{i}" for i in range(BASKET_WIDTH)])
+
+
+def _sales_chunk(n, catalog, weights, days, rng):
+    ids = rng.choice(len(catalog), n, p=weights)
+    day = rng.integers(0, len(days), n)
+    # Seasonal swing over the year so the forecasters have something to fit
+    quantity = rng.poisson(2 + np.sin(2 * np.pi * day / 365) + 1, n) + 1
+    return ids, day, quantity
+
+
+# Write a full data directory with `rows` sales rows, `rows` baskets and up to n_products products
+def generate_dataset(out_dir, rows, n_products=5000, years=3, seed=42):
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    n_products = min(n_products, max(rows // 2, 50))
+
+    catalog = generate_catalog(n_products, rng)
+    catalog.to_csv(os.path.join(out_dir, DATASETS["catalog"]["file"]), index=False)
+    names = catalog["Name"].to_numpy(dtype=object)
+    prices = catalog["UnitPrice"].to_numpy(dtype=float)
+    weights = _popularity(n_products)
+    partner = rng.permutation(n_products)
+
+    days = pd.date_range("2021-01-01", periods=365 * years, freq="D")
+    dayfirst = np.asarray(days.strftime("%d-%m-%Y"), dtype=object)
+
+    paths = {name: os.path.join(out_dir, spec["file"]) for name, spec in DATASETS.items() if name != "catalog"}
+    paths["baskets"] = os.path.join(out_dir, BASKETS_FILE)
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+    for start in range(0, rows, CHUNK_ROWS):
+        n = min(CHUNK_ROWS, rows - start)
+        header = start == 0
+        _basket_chunk(n, names, partner, weights, rng).to_csv(paths["baskets"], mode="a", header=header, index=False)
+
+        ids, day, quantity = _sales_chunk(n, catalog, weights, days, rng)
+        unit_price = prices[ids] * rng.uniform(0.9, 1.1, n)
+        pd.DataFrame({
+            "Date": dayfirst[day], "Name": names[ids], "Location": rng.choice(LOCATIONS, n),
+            "Quantity": quantity, "UnitPrice": unit_price.round(2),
+        }).to_csv(paths["location_sales"], mode="a", header=header, index=False)
+        pd.DataFrame({
+            "Date": dayfirst[day], "Name": names[ids], "Quantity": quantity,
+        }).to_csv(paths["sales"], mode="a", header=header, index=False)
+        pd.DataFrame({
+            "Name": names[ids], "Quantity": quantity, "UnitPrice": unit_price.round(2),
+            "Year": days[day].year, "Month": days[day].month, "DayOfWeek": days[day].dayofweek,
+            "SalesAmount": (quantity * unit_price).round(2),
+        }).to_csv(paths["hybrid"], mode="a", header=header, index=False)
+    return paths
+
+
+# ---------------- measurement ----------------
+
+def _measure(run, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(min(times), 6), "median_seconds": round(float(np.median(times)), 6),
+            "peak_mb": round(peak / 1024 ** 2, 3)}
+
+
+def _max_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+# Inputs of each case are prepared once, outside the timed call
+def run_cases(data_dir, repeat=3, min_support=0.01, lookups=1000, max_hybrid_rows=200_000, only=None):
+    baskets = os.path.join(data_dir, BASKETS_FILE)
+    state = {}
+
+    def prepare_rules():
+        if "rules" not in state:
+            state["matrix"], state["items"] = load_basket_matrix(baskets)
+            state["rules"] = mine_rules(state["matrix"], state["items"], min_support=min_support)
+            state["index"] = build_rule_index(state["rules"])
+        return state
+
+    def prepare_cube():
+        if "cube" not in state:
+            state["cube"] = build_sales_cube(load_location_sales(data_dir=data_dir),
+                                             build_product_dimension(load_catalog(data_dir=data_dir)))
+        return state
+
+    def lookups_case():
+        index = prepare_rules()["index"]
+        products = indexed_products(index)[:lookups] or ["missing"]
+        return lambda: [lookup_recommendations(index, product) for product in products]
+
+    def rollups_case():
+        cube = prepare_cube()["cube"]
+        location = cube_locations(cube)[0]
+        return lambda: (
+            rollup(cube, "Category", ("Quantity", "Revenue"), location),
+            rollup(cube, "Month", ("Quantity",), location),
+            rollup(cube, "Date", ("Quantity", "UnitPrice"), location),
+            top_members(cube, "Name", "Quantity", 10, location),
+            top_members(cube, "Name", "Revenue", 10, location),
+        )
+
+    cases = {
+        "load_baskets": lambda: lambda: load_basket_matrix(baskets),
+        "mine_rules": lambda: (lambda s: lambda: mine_rules(s["matrix"], s["items"], min_support=min_support))(
+            prepare_rules()),
+        "rule_index": lambda: (lambda rules: lambda: build_rule_index(rules))(prepare_rules()["rules"]),
+        "lookups": lookups_case,
+        "fit_arima": lambda: (lambda sales: lambda: fit_arima(sales, ARIMA_ORDER, FORECAST_STEPS))(
+            read_table("sales", columns=["Date", "Quantity"], data_dir=data_dir)),
+        "fit_hybrid": lambda: (lambda df: lambda: fit_hybrid(df, n_estimators=20))(
+            read_table("hybrid", data_dir=data_dir).head(max_hybrid_rows)),
+        "sales_cube": lambda: (lambda sales, products: lambda: build_sales_cube(sales, products))(
+            load_location_sales(data_dir=data_dir), build_product_dimension(load_catalog(data_dir=data_dir))),
+        "rollups": rollups_case,
+        "location_kpis": lambda: (lambda cube: lambda: location_kpis(cube))(prepare_cube()["cube"]),
+    }
+
+    results = []
+    for name, make in cases.items():
+        if only and name not in only:
+            continue
+        result = _measure(make(), repeat)
+        results.append(dict(case=name, **result))
+        print(f"  {name:<16}{result['seconds']:>10.4f} s {result['peak_mb']:>10.1f} MB", file=sys.stderr)
+    return results
+
+
+# Cases whose time or peak memory grew by more than `tolerance` over the baseline
+def regressions(results, baseline, tolerance=0.25):
+    before = {(r["rows"], r["case"]): r for r in baseline["results"]}
+    found = []
+    for result in results:
+        old = before.get((result["rows"], result["case"]))
+        if old is None:
+            continue
+        for metric in ("seconds", "peak_mb"):
+            if old[metric] > 0 and result[metric] > old[metric] * (1 + tolerance):
+                found.append({"rows": result["rows"], "case": result["case"], "metric": metric,
+                              "baseline": old[metric], "current": result[metric]})
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot paths on synthetic data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000],
+                        help="sales rows and baskets per scale (e.g. 10000 ... 10000000)")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-support", type=float, default=0.01)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--max-hybrid-rows", type=int, default=200_000)
+    parser.add_argument("--cases", nargs="*", default=None, help="only run these cases")
+    parser.add_argument("--work-dir", default=".bench_data")
+    parser.add_argument("--output", default=None, help="write the JSON results here")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = []
+    for rows in args.rows:
+        data_dir = os.path.join(args.work_dir, f"rows-{rows}-seed-{args.seed}")
+        # Same rows, products and seed give the same files, so a finished dataset is reused
+        marker = os.path.join(data_dir, f".products-{args.products}")
+        if not os.path.exists(marker):
+            print(f"{rows:,} rows: generating {data_dir}", file=sys.stderr)
+            generate_dataset(data_dir, rows, args.products, seed=args.seed)
+            open(marker, "w").close()
+        else:
+            print(f"{rows:,} rows: reusing {data_dir}", file=sys.stderr)
+        for result in run_cases(data_dir, args.repeat, args.min_support, args.lookups,
+                                args.max_hybrid_rows, args.cases):
+            results.append(dict(rows=rows, **result))
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "seed": args.seed,
+        "max_rss_mb": _max_rss_mb(),
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = regressions(results, json.load(f), args.tolerance)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return 1 if report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from data_store import DATA_DIR, read_table
+
+
+# Sales rows with locations and revenue; a location is pushed down into the columnar read
+def load_location_sales(location=None, data_dir=DATA_DIR):
+    filters = [("Location", "==", location)] if location is not None else None
+    df = read_table("location_sales", filters=filters, data_dir=data_dir)
+    df['Month'] = df['Date'].dt.month
+    df['Revenue'] = df['Quantity'] * df['UnitPrice']
+    return df
+
+
+# Product catalog ('Categoty' is renamed to 'Category' when the columnar copy is built)
+def load_catalog(columns=None, data_dir=DATA_DIR):
+    return read_table("catalog", columns=columns, data_dir=data_dir)
+
+
+# The four summary boxes of the overview page, one row per location, rolled up from the sales cube
+def location_summary(cube):
+    totals = cube["location_totals"][['Revenue', 'Quantity']].rename(
+        columns={'Revenue': 'TotalSales', 'Quantity': 'TotalQuantity'}
+    )
+    category_revenue = cube["cube"].groupby(['Location', 'Category'], observed=True)['Revenue'].sum()
+    top_category = category_revenue.groupby(level='Location', observed=True).idxmax().str[1].rename('TopCategory')
+    summary = totals.join(top_category)
+    summary['TotalSales'] = summary['TotalSales'].astype(int)
+    summary['TotalQuantity'] = summary['TotalQuantity'].astype(int)
+    return summary
+
+
+# KPIs of every location side by side, from grouped passes over the whole cube:
+#   summary      one row per location (summary boxes, order rows, share, last-month growth,
+#                rank by revenue), best store first
+#   monthly      Quantity and Revenue per (Location, Month)
+#   top_products the top_n products by revenue of each location
+def location_kpis(cube, top_n=5):
+    rows = cube["cube"]
+    totals = cube["location_totals"]
+    summary = location_summary(cube)
+    summary['Orders'] = totals['Rows'].astype(int)
+    summary['AvgUnitPrice'] = totals['UnitPriceSum'] / totals['Rows']
+    summary['RevenueShare'] = totals['Revenue'] / totals['Revenue'].sum()
+
+    monthly = rows.groupby(['Location', 'Month'], observed=True)[['Quantity', 'Revenue']].sum().reset_index()
+    # Every location over the same months, a month without sales as 0, so growth is always the
+    # latest month against the one before it: -100% for a store that sold nothing last month,
+    # NaN for one that sold nothing the month before
+    months = pd.date_range(monthly['Month'].min(), monthly['Month'].max(), freq='MS')
+    revenue = (monthly.pivot_table(index='Month', columns='Location', values='Revenue', aggfunc='sum', observed=True)
+               .reindex(months).fillna(0))
+    previous = revenue.shift().iloc[-1]
+    summary['LastMonthGrowth'] = (revenue.iloc[-1] / previous - 1).where(previous > 0)
+
+    products = rows.groupby(['Location', 'Name'], observed=True)[['Quantity', 'Revenue']].sum().reset_index()
+    top_products = (products.sort_values(['Location', 'Revenue'], ascending=[True, False], kind='mergesort')
+                    .groupby('Location', observed=True).head(top_n).reset_index(drop=True))
+
+    summary['Rank'] = totals['Revenue'].rank(ascending=False, method='min').astype(int)
+    summary = summary.sort_values('Rank', kind='mergesort')
+    return {"summary": summary, "monthly": monthly, "top_products": top_products}
@@ -0,0 +1,141 @@
+import hashlib
+import os
+import tempfile
+
+import pandas as pd
+
+from instrumentation import stage
+
+
+# DMART_DATA_DIR points every page and the pipeline at another copy of the data
+DATA_DIR = os.environ.get("DMART_DATA_DIR", "E:/be project final")
+COLUMNAR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".columnar")
+
+# Source CSVs and how each is typed once at conversion time: date columns are parsed,
+# repeated strings become dictionary-encoded categoricals
+DATASETS = {
+    "location_sales": {
+        "file": "dmart_sales_with_locations.csv",
+        "dates": {"Date": {"dayfirst": True}},
+        "categories": ["Name", "Location"],
+    },
+    "sales": {
+        "file": "dmart_sales_with_names fi.csv",
+        "dates": {"Date": {"format": "%d-%m-%Y", "errors": "coerce"}},
+        "dropna": ["Date"],
+        "categories": ["Name"],
+    },
+    "hybrid": {
+        "file": "processed_dmart_sales1.csv",
+        "categories": ["Name"],
+    },
+    "catalog": {
+        "file": "dmart cat.csv",
+        "rename": {"Categoty": "Category"},
+        "categories": ["Name", "Brand", "Category", "SubCategory"],
+    },
+}
+
+# The basket file is read by basket_loader rather than as a table, so it has no DATASETS entry
+BASKETS_FILE = "enhanced_apriori_dataset1.csv"
+
+_OPERATORS = {
+    "==": lambda s, v: s == v,
+    "!=": lambda s, v: s != v,
+    "<": lambda s, v: s < v,
+    "<=": lambda s, v: s <= v,
+    ">": lambda s, v: s > v,
+    ">=": lambda s, v: s >= v,
+    "in": lambda s, v: s.isin(v),
+    "not in": lambda s, v: ~s.isin(v),
+}
+
+
+def _parquet():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None
+    return pq
+
+
+def source_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, BASKETS_FILE if name == "baskets" else DATASETS[name]["file"])
+
+
+# Typed frame straight from the source CSV
+def read_source(name, data_dir=DATA_DIR):
+    spec = DATASETS[name]
+    with stage(f"read_csv:{name}") as read:
+        df = pd.read_csv(source_path(name, data_dir))
+        read.set_rows(len(df))
+    df.rename(columns=spec.get("rename", {}), inplace=True)
+    with stage(f"parse_dates:{name}", rows=len(df)):
+        for column, options in spec.get("dates", {}).items():
+            df[column] = pd.to_datetime(df[column], **options)
+    if spec.get("dropna"):
+        df.dropna(subset=spec["dropna"], inplace=True)
+        df.reset_index(drop=True, inplace=True)
+    for column in spec.get("categories", []):
+        df[column] = df[column].astype("category")
+    return df
+
+
+def columnar_path(name, data_dir=DATA_DIR):
+    tag = hashlib.sha1(os.path.abspath(source_path(name, data_dir)).encode()).hexdigest()[:12]
+    return os.path.join(COLUMNAR_DIR, f"{name}-{tag}.parquet")
+
+
+# Convert the source CSV to Parquet unless an up-to-date copy already exists
+def ensure_columnar(name, data_dir=DATA_DIR):
+    pq = _parquet()
+    if pq is None:
+        return None
+    path = columnar_path(name, data_dir)
+    source = source_path(name, data_dir)
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+        return path
+
+    import pyarrow as pa
+    table = pa.Table.from_pandas(read_source(name, data_dir), preserve_index=False)
+    os.makedirs(COLUMNAR_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=COLUMNAR_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp_path, row_group_size=64_000)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+# Read a dataset, loading only `columns` and the rows matching `filters`.
+# filters: list of (column, op, value) tuples ANDed together, op one of _OPERATORS.
+# With pyarrow the Parquet copy is memory-mapped and the filters are pushed into the scan;
+# without it the CSV is parsed and filtered in pandas.
+def read_table(name, columns=None, filters=None, data_dir=DATA_DIR):
+    for _, op, _ in filters or []:
+        if op not in _OPERATORS:
+            raise ValueError(f"Unknown filter operator '{op}', expected one of {tuple(_OPERATORS)}")
+
+    with stage(f"read_table:{name}") as read:
+        path = ensure_columnar(name, data_dir)
+        if path is not None:
+            table = _parquet().read_table(path, columns=columns, filters=filters or None, memory_map=True)
+            df = table.to_pandas()
+        else:
+            df = read_source(name, data_dir)
+            for column, op, value in filters or []:
+                df = df[_OPERATORS[op](df[column], value)]
+            df = df.reset_index(drop=True)
+            if columns is not None:
+                df = df[columns]
+
+        # Categories that the filters removed shouldn't show up as empty groups
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].cat.remove_unused_categories()
+        read.set_rows(len(df))
+    return df
@@ -1,72 +1,142 @@
+import queue
 import sqlite3
-import hashlib
+import threading
+from contextlib import contextmanager
 
-# Helper function to create a connection to SQLite
-def get_connection():
-    conn = sqlite3.connect('users_data.db')  # Database file
+from passwords import hash_password, verify_password
+
+DB_PATH = 'users_data.db'  # Database file
+
+# Bounded pool of connections shared by every thread. Streamlit runs most reruns on a fresh
+# script thread, so per-thread connections would be reopened on nearly every rerun; pooled
+# ones are opened once and handed from thread to thread (hence check_same_thread=False).
+POOL_SIZE = 4
+_pool = queue.LifoQueue()
+_opened = []
+_pool_lock = threading.Lock()
+
+def _open_connection():
+    # cached_statements keeps the prepared statements below compiled between calls
+    conn = sqlite3.connect(DB_PATH, timeout=30, cached_statements=256, check_same_thread=False)
+    conn.execute('PRAGMA busy_timeout=30000')  # wait for a lock instead of "database is locked"
+    conn.execute('PRAGMA synchronous=NORMAL')
     return conn
 
+# Borrow a pooled connection for the duration of a with block; opens one while fewer than
+# POOL_SIZE exist, otherwise waits for another thread to return one
+@contextmanager
+def connection():
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = None
+        with _pool_lock:
+            if len(_opened) < POOL_SIZE:
+                conn = _open_connection()
+                _opened.append(conn)
+        if conn is None:
+            conn = _pool.get()
+    try:
+        yield conn
+    finally:
+        with _pool_lock:
+            pooled = conn in _opened
+        if not pooled:
+            conn.close()  # the pool was closed while this one was borrowed
+        else:
+            if conn.in_transaction:
+                conn.rollback()  # never hand the next borrower a half-finished transaction
+            _pool.put(conn)
+
+# Close the pooled connections (e.g. at shutdown or in tests); borrowed ones close when returned
+def close_connection():
+    with _pool_lock:
+        while True:
+            try:
+                _pool.get_nowait().close()
+            except queue.Empty:
+                break
+        _opened.clear()
+
+# Prepare the database file: WAL mode (kept in the file, so readers never block the writer)
+# and the users table. Called once by the app rather than at import, so importing this
+# module never writes to the database.
+def init_db():
+    with connection() as conn:
+        conn.execute('PRAGMA journal_mode=WAL')
+    create_users_table()
+
 # Create the users table
 def create_users_table():
-    conn = get_connection()
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            email TEXT UNIQUE,
-            password TEXT
-        );
-    ''')
-    conn.commit()
-    conn.close()
+    with connection() as conn, conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                username TEXT PRIMARY KEY,
+                email TEXT UNIQUE,
+                password TEXT
+            );
+        ''')
 
-# Hash password before storing it
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+# Each side of "username or email" is its own query so it can use the primary key / unique index
+_USER_EXISTS_SQL = '''
+    SELECT 1 FROM users WHERE username = ?
+    UNION ALL
+    SELECT 1 FROM users WHERE email = ?
+    LIMIT 1
+'''
+_FIND_USER_SQL = '''
+    SELECT * FROM users WHERE username = ?
+    UNION ALL
+    SELECT * FROM users WHERE email = ?
+'''
 
 # Save user to database
 def save_user_to_db(username, email, password):
-    conn = get_connection()
     hashed_password = hash_password(password)
 
     try:
-        conn.execute("INSERT INTO users (username, email, password) VALUES (?, ?, ?)", (username, email, hashed_password))
-        conn.commit()
+        with connection() as conn, conn:
+            conn.execute("INSERT INTO users (username, email, password) VALUES (?, ?, ?)", (username, email, hashed_password))
     except sqlite3.IntegrityError:
         return False  # User already exists
-    finally:
-        conn.close()
     return True
 
+# Import many accounts in one transaction; rows are (username, email, password).
+# Accounts whose username or email is already taken are skipped. Returns the number added.
+# hasher lets callers hash in a worker pool, e.g. auth.AuthService.hash_many.
+def import_users(users, hasher=None):
+    users = list(users)
+    passwords = [password for _, _, password in users]
+    hashes = hasher(passwords) if hasher else [hash_password(password) for password in passwords]
+    rows = [(username, email, hashed) for (username, email, _), hashed in zip(users, hashes)]
+    with connection() as conn, conn:
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO users (username, email, password) VALUES (?, ?, ?)", rows)
+        return conn.total_changes - before
+
 # Check if a user exists
 def is_user_exists(username=None, email=None):
-    conn = get_connection()
-    cursor = conn.execute("SELECT * FROM users WHERE username = ? OR email = ?", (username, email))
-    user = cursor.fetchone()
-    conn.close()
-    return user is not None
+    with connection() as conn:
+        return conn.execute(_USER_EXISTS_SQL, (username, email)).fetchone() is not None
 
-# Validate login credentials
+# Validate login credentials; legacy SHA-256 (or outdated cost) hashes are upgraded on success
 def validate_login(username_or_email, password):
-    conn = get_connection()
-    hashed_password = hash_password(password)
-    cursor = conn.execute(
-        "SELECT * FROM users WHERE (username = ? OR email = ?) AND password = ?",
-        (username_or_email, username_or_email, hashed_password)
-    )
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    with connection() as conn:
+        users = conn.execute(_FIND_USER_SQL, (username_or_email, username_or_email)).fetchall()
+    for user in users:
+        matches, needs_rehash = verify_password(password, user[2])
+        if matches:
+            if needs_rehash:
+                with connection() as conn, conn:
+                    conn.execute("UPDATE users SET password = ? WHERE username = ?", (hash_password(password), user[0]))
+            return user
+    return None
 
 # Update user password
 def update_user_password(identifier, new_password, by_email=False):
-    conn = get_connection()
     hashed_password = hash_password(new_password)
-    if by_email:
-        conn.execute("UPDATE users SET password = ? WHERE email = ?", (hashed_password, identifier))
-    else:
-        conn.execute("UPDATE users SET password = ? WHERE username = ?", (hashed_password, identifier))
-    conn.commit()
-    conn.close()
-
-# Ensure table is created
-create_users_table()
+    with connection() as conn, conn:
+        if by_email:
+            conn.execute("UPDATE users SET password = ? WHERE email = ?", (hashed_password, identifier))
+        else:
+            conn.execute("UPDATE users SET password = ? WHERE username = ?", (hashed_password, identifier))
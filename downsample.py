@@ -0,0 +1,75 @@
+import numpy as np
+
+
+# Points per line trace sent to the browser; longer series are downsampled to this many
+MAX_POINTS = 1500
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+# Largest-Triangle-Three-Buckets: indices of `threshold` points (first and last always kept)
+# that preserve the visual shape of the line y(x). x must be sorted.
+def lttb(x, y, threshold):
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x, y = _as_float(x), _as_float(y)
+
+    # Interior points split into threshold - 2 buckets; edges[i]:edges[i + 1] is bucket i
+    edges = (np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    # Mean of each bucket, used as the third corner for the bucket before it
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        area = np.abs((x[a] - mean_x[i]) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (mean_y[i] - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+# Min and max of each of `buckets` equal-width chunks, in x order; keeps every spike
+def min_max(y, buckets):
+    n = len(y)
+    if 2 * buckets >= n:
+        return np.arange(n)
+    y = _as_float(y)
+    edges = (np.arange(buckets + 1) * n / buckets).astype(np.int64)
+    keep = []
+    for start, stop in zip(edges[:-1], edges[1:]):
+        chunk = y[start:stop]
+        keep.extend(sorted({start + int(chunk.argmin()), start + int(chunk.argmax())}))
+    return np.asarray(keep, dtype=np.int64)
+
+
+METHODS = ("lttb", "minmax")
+
+
+# At most max_points rows of a frame sorted by x, chosen to keep the shape of the y trace.
+# Frames that already fit are returned as they are.
+def downsample_frame(frame, x, y, max_points=MAX_POINTS, method="lttb"):
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}', expected one of {METHODS}")
+    if len(frame) <= max_points:
+        return frame
+    frame = frame.sort_values(x, kind="mergesort")
+    if method == "lttb":
+        keep = lttb(frame[x].to_numpy(), frame[y].to_numpy(), max_points)
+    else:
+        keep = min_max(frame[y].to_numpy(), max_points // 2)
+    return frame.iloc[keep].reset_index(drop=True)
+
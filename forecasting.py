@@ -0,0 +1,56 @@
+import numpy as np
+
+from instrumentation import stage
+
+
+ARIMA_ORDER = (1, 1, 1)  # (p, d, q) - Can be tuned
+FORECAST_STEPS = 2
+HYBRID_PARAMS = {"n_estimators": 100, "test_size": 0.2, "random_state": 42}
+
+
+# Fit ARIMA on monthly quantity; "result" is the tuple the forecasting page unpacks
+def fit_arima(data, order=ARIMA_ORDER, steps=FORECAST_STEPS):
+    from statsmodels.tsa.arima.model import ARIMA
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+    monthly_sales = data.resample('ME', on='Date')['Quantity'].sum().reset_index()
+
+    with stage("arima.fit", rows=len(monthly_sales)):
+        model = ARIMA(monthly_sales['Quantity'], order=order)
+        model_fit = model.fit()
+
+    predictions = model_fit.predict(start=1, end=len(monthly_sales) - 1)
+    forecast = model_fit.forecast(steps=steps)
+
+    mae = mean_absolute_error(monthly_sales['Quantity'][1:], predictions)
+    rmse = np.sqrt(mean_squared_error(monthly_sales['Quantity'][1:], predictions))
+    mape = np.mean(np.abs((monthly_sales['Quantity'][1:] - predictions) / monthly_sales['Quantity'][1:])) * 100
+    accuracy = 100 - mape
+    return {"model": model_fit, "result": (monthly_sales, predictions, forecast, mae, rmse, mape, accuracy)}
+
+
+# Random forest + decision tree + linear regression averaged; per-product actual vs predicted totals.
+# Each model predicts the full frame once; the held-out MAE reuses those predictions.
+def fit_hybrid(df, n_estimators=100, test_size=0.2, random_state=42):
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import mean_absolute_error
+    from hybrid_model import HybridEnsemble
+
+    X = df.drop(columns=["SalesAmount", "Name"], errors='ignore')
+    y = df["SalesAmount"]
+
+    train_rows, test_rows = train_test_split(np.arange(len(df)), test_size=test_size, random_state=random_state)
+
+    model = HybridEnsemble(n_estimators=n_estimators, random_state=random_state)
+    model.fit(X.iloc[train_rows], y.iloc[train_rows])
+
+    with stage("hybrid.predict", rows=len(X)):
+        predicted = model.predict(X)
+    mae = mean_absolute_error(y.iloc[test_rows], predicted[test_rows])
+
+    df = df.assign(PredictedSalesAmount=predicted)
+    product_sales = df.groupby("Name", observed=True).agg(
+        ActualSalesAmount=("SalesAmount", "sum"),
+        PredictedSalesAmount=("PredictedSalesAmount", "sum")
+    ).reset_index()
+    return {"model": model, "product_sales": product_sales, "mae": mae}
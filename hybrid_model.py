@@ -0,0 +1,181 @@
+import glob
+import os
+import pickle
+import tempfile
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+
+TARGET = "SalesAmount"
+DROP_COLUMNS = ["SalesAmount", "Name"]
+
+
+# Random forest + decision tree + linear regression, averaged.
+# fit() trains from scratch; partial_fit() folds in appended rows without the old ones:
+#   - the forest grows `growth` extra trees on the new rows (warm start),
+#   - the linear model is re-solved exactly from accumulated X'X / X'y,
+#   - the tree is refitted on a bounded reservoir sample of every row seen plus the new rows.
+# Each fit/partial_fit bumps `version` (the model's own update count); save_model numbers files
+# by what is already in the directory, so models saved side by side never share a file.
+class HybridEnsemble:
+    def __init__(self, n_estimators=100, random_state=42, n_jobs=-1, growth=10, reservoir_size=50_000):
+        self.n_estimators = n_estimators
+        self.random_state = random_state
+        self.n_jobs = n_jobs
+        self.growth = growth
+        self.reservoir_size = reservoir_size
+        self.version = 0
+        self.rows_seen = 0
+        self.feature_names = None
+        self.history = []
+
+    def fit(self, X, y):
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.tree import DecisionTreeRegressor
+        from sklearn.linear_model import LinearRegression
+
+        X, y = self._check(X, fit=True), np.asarray(y, dtype=float)
+        self.rf = RandomForestRegressor(
+            n_estimators=self.n_estimators, random_state=self.random_state, n_jobs=self.n_jobs, warm_start=True
+        )
+        self.dt = DecisionTreeRegressor(random_state=self.random_state)
+        self.lr = LinearRegression()
+        with stage("random_forest.fit", rows=len(y)):
+            self.rf.fit(X, y)
+        with stage("decision_tree.fit", rows=len(y)):
+            self.dt.fit(X, y)
+        with stage("linear_regression.fit", rows=len(y)):
+            self.lr.fit(X, y)
+
+        self._rng = np.random.default_rng(self.random_state)
+        self._xtx, self._xty = self._moments(X, y)
+        self._reservoir_X, self._reservoir_y = X[:0], y[:0]
+        self.rows_seen = 0
+        self._sample(X, y)
+        return self._bump("fit", len(y))
+
+    def partial_fit(self, X, y):
+        if self.feature_names is None:
+            return self.fit(X, y)
+        X, y = self._check(X), np.asarray(y, dtype=float)
+        if len(y) == 0:
+            return self
+
+        self.rf.n_estimators += self.growth
+        self.rf.fit(X, y)
+
+        xtx, xty = self._moments(X, y)
+        self._xtx += xtx
+        self._xty += xty
+        coef = np.linalg.lstsq(self._xtx, self._xty, rcond=None)[0]
+        self.lr.intercept_, self.lr.coef_ = coef[0], coef[1:]
+
+        self.dt.fit(np.vstack([self._reservoir_X, X]), np.concatenate([self._reservoir_y, y]))
+        self._sample(X, y)
+        return self._bump("partial_fit", len(y))
+
+    def predict(self, X):
+        X = self._check(X)
+        return (self.rf.predict(X) + self.dt.predict(X) + self.lr.predict(X)) / 3
+
+    # Score rows a chunk at a time; chunks is any iterable of frames (e.g. read_csv(chunksize=...))
+    def predict_chunks(self, chunks):
+        for chunk in chunks:
+            yield chunk.assign(PredictedSalesAmount=self.predict(chunk))
+
+    def _check(self, X, fit=False):
+        if isinstance(X, pd.DataFrame):
+            X = X.drop(columns=DROP_COLUMNS, errors="ignore")
+            if fit:
+                self.feature_names = list(X.columns)
+            X = X[self.feature_names]
+        elif fit:
+            self.feature_names = list(range(np.shape(X)[1]))
+        return np.asarray(X, dtype=float)
+
+    @staticmethod
+    def _moments(X, y):
+        design = np.hstack([np.ones((len(X), 1)), X])
+        return design.T @ design, design.T @ y
+
+    # Reservoir sample (algorithm R) of every row seen, for refitting the single tree
+    def _sample(self, X, y):
+        room = min(max(self.reservoir_size - len(self._reservoir_y), 0), len(y))
+        self._reservoir_X = np.vstack([self._reservoir_X, X[:room]])
+        self._reservoir_y = np.concatenate([self._reservoir_y, y[:room]])
+
+        # Row i of the rest replaces a random slot with probability size / (rows seen so far)
+        seen = self.rows_seen + room + np.arange(1, len(y) - room + 1)
+        slots = (self._rng.random(len(seen)) * seen).astype(np.int64)
+        keep = slots < self.reservoir_size
+        self._reservoir_X[slots[keep]] = X[room:][keep]
+        self._reservoir_y[slots[keep]] = y[room:][keep]
+        self.rows_seen += len(y)
+
+    def _bump(self, action, rows):
+        self.version += 1
+        self.history.append({
+            "version": self.version,
+            "action": action,
+            "rows": rows,
+            "trees": self.rf.n_estimators,
+            "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        })
+        return self
+
+
+# Actual vs predicted SalesAmount per product, scored chunk by chunk from a CSV
+def score_file(model, path, chunksize=100_000):
+    totals = None
+    for chunk in model.predict_chunks(pd.read_csv(path, chunksize=chunksize)):
+        part = chunk.groupby("Name", observed=True)[[TARGET, "PredictedSalesAmount"]].sum()
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    if totals is None:
+        return pd.DataFrame(columns=["Name", "ActualSalesAmount", "PredictedSalesAmount"])
+    return totals.rename(columns={TARGET: "ActualSalesAmount"}).reset_index()
+
+
+def _model_path(directory, version):
+    return os.path.join(directory, f"hybrid-v{version:04d}.pkl")
+
+
+def _saved_versions(directory):
+    names = (os.path.basename(path) for path in glob.glob(os.path.join(directory, "hybrid-v*.pkl")))
+    return sorted(int(name[len("hybrid-v"):-len(".pkl")]) for name in names
+                  if name[len("hybrid-v"):-len(".pkl")].isdigit())
+
+
+# Versioned model files: <directory>/hybrid-v<version>.pkl, version one past the newest on disk.
+# The model is written to a temporary file first and then hard-linked to its versioned name,
+# which fails rather than overwrites if another saver took that version in the meantime; readers
+# never see a partly written file.
+def save_model(model, directory):
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        version = (_saved_versions(directory) or [0])[-1] + 1
+        while True:
+            path = _model_path(directory, version)
+            try:
+                os.link(tmp_path, path)
+                return path
+            except FileExistsError:
+                version += 1
+    finally:
+        os.remove(tmp_path)
+
+
+def load_model(directory, version=None):
+    if version is None:
+        versions = _saved_versions(directory)
+        if not versions:
+            return None
+        version = versions[-1]
+    with open(_model_path(directory, version), "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,189 @@
+"""Import-time report for the app's modules.
+
+    python import_report.py                 table of cold import times
+    python import_report.py --json          the same as JSON
+    python import_report.py --max-login-ms 300
+
+Each module is imported in a fresh interpreter with `python -X importtime`, so every
+number is a cold start. The page modules defer their heavy imports into function bodies,
+so importing one costs almost nothing; for each page the report also imports what opening
+it pulls in (the imports at module level and directly inside its top-level functions) and,
+separately, everything it can import once every step has run (imports in nested functions too).
+
+The login path (database + auth) must not pull in any of the heavy scientific packages; the
+report exits with status 1 if it does, or if its import time goes over --max-login-ms.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+
+# What app.py needs before anyone has logged in
+LOGIN_MODULES = ["database", "auth"]
+PAGE_MODULES = ["visualization", "recommendation", "pipeline", "recommendation_server"]
+HEAVY_PACKAGES = ["pandas", "numpy", "scipy", "sklearn", "statsmodels", "plotly", "mlxtend", "pyarrow"]
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# Cumulative import time (ms) of every module loaded by `import <statement>` in a fresh interpreter
+def measure(statement, python=sys.executable, cwd=None):
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", statement],
+        cwd=cwd or HERE, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"`{statement}` failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    modules = {}
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        modules.setdefault(name, int(cumulative) / 1000)
+    return modules
+
+
+# Parsed source of one of the app's own modules, None for anything else
+def _module_imports(module, cwd=None):
+    path = os.path.join(cwd or HERE, module.replace(".", os.sep) + ".py")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return ast.parse(f.read())
+
+
+# Modules a page module imports, as (on opening, later): opening covers its module level and
+# the bodies of its top-level functions; later the functions nested inside those (one step each)
+# plus every import, at any depth, of the app's own modules that it reaches, since a step that
+# calls e.g. forecasting.fit_arima pays for the statsmodels import inside it
+def page_imports(module, cwd=None):
+    opening, later = set(), set()
+
+    def visit(node, depth, found_opening, found_later):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.Import):
+                names = {alias.name for alias in child.names}
+            elif isinstance(child, ast.ImportFrom) and child.module and not child.level:
+                names = {child.module}
+            else:
+                names = set()
+            (found_opening if depth <= 1 else found_later).update(names)
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                visit(child, depth + 1, found_opening, found_later)
+            else:
+                visit(child, depth, found_opening, found_later)
+
+    visit(_module_imports(module, cwd), 0, opening, later)
+    seen, pending = {module}, sorted(opening | later)
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        tree = _module_imports(name, cwd)
+        if tree is not None:
+            found = set()
+            visit(tree, 0, found, found)
+            later.update(found)
+            pending.extend(sorted(found - seen))
+    return sorted(opening), sorted(later - opening)
+
+
+_LOAD_SCRIPT = """
+import importlib, json, sys, time
+def load(names):
+    start = time.perf_counter()
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass  # optional dependency that isn't installed
+    return round((time.perf_counter() - start) * 1000, 1), sorted(sys.modules)
+open_ms, open_modules = load({opening!r})
+later_ms, all_modules = load({later!r})
+print(json.dumps({{"open_ms": open_ms, "later_ms": later_ms, "open_modules": open_modules, "all_modules": all_modules}}))
+"""
+
+
+# Wall time (ms) of importing `opening` and then `later` in one fresh interpreter, with the
+# modules loaded after each
+def _load_times(opening, later, python=sys.executable, cwd=None):
+    proc = subprocess.run(
+        [python, "-c", _LOAD_SCRIPT.format(opening=list(opening), later=list(later))],
+        cwd=cwd or HERE, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"loading {opening + later} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def module_report(module, **kwargs):
+    modules = measure(f"import {module}", **kwargs)
+    opening, later = page_imports(module, kwargs.get("cwd"))
+    loaded = _load_times([module] + opening, later, **kwargs)
+    open_modules, all_modules = set(loaded["open_modules"]), set(loaded["all_modules"])
+    return {
+        "module": module,
+        "ms": round(modules.get(module, 0.0), 1),
+        "open_ms": loaded["open_ms"],
+        "all_ms": round(loaded["open_ms"] + loaded["later_ms"], 1),
+        "modules_loaded": len(all_modules),
+        "heavy": [pkg for pkg in HEAVY_PACKAGES if pkg in open_modules],
+        "heavy_later": [pkg for pkg in HEAVY_PACKAGES if pkg in all_modules and pkg not in open_modules],
+    }
+
+
+def build_report(modules=None, **kwargs):
+    login = measure("; ".join(f"import {m}" for m in LOGIN_MODULES), **kwargs)
+    return {
+        "login": {
+            "modules": LOGIN_MODULES,
+            "ms": round(sum(login.get(m, 0.0) for m in LOGIN_MODULES), 1),
+            "heavy": [pkg for pkg in HEAVY_PACKAGES if pkg in login],
+        },
+        "pages": [module_report(m, **kwargs) for m in (modules or PAGE_MODULES)],
+    }
+
+
+def problems(report, max_login_ms=None):
+    found = []
+    if report["login"]["heavy"]:
+        found.append("login path imports " + ", ".join(report["login"]["heavy"]))
+    if max_login_ms is not None and report["login"]["ms"] > max_login_ms:
+        found.append(f"login path imports in {report['login']['ms']} ms (budget {max_login_ms} ms)")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import times of the app's modules.")
+    parser.add_argument("modules", nargs="*", help=f"modules to measure (default: {' '.join(PAGE_MODULES)})")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--max-login-ms", type=float, default=None, help="fail if the login path is slower")
+    args = parser.parse_args(argv)
+
+    report = build_report(args.modules)
+    found = problems(report, args.max_login_ms)
+    if args.json:
+        print(json.dumps(dict(report, problems=found), indent=2))
+    else:
+        login = report["login"]
+        print(f"{'':<24}{'import':>10}{'open':>10}{'all steps':>12}")
+        print(f"{'login (' + ' + '.join(login['modules']) + ')':<24}{login['ms']:>7.1f} ms")
+        for row in report["pages"]:
+            heavy = ", ".join(row["heavy"]) or "-"
+            later = ", ".join(row["heavy_later"]) or "-"
+            print(f"{row['module']:<24}{row['ms']:>7.1f} ms{row['open_ms']:>7.1f} ms{row['all_ms']:>9.1f} ms"
+                  f"  {row['modules_loaded']:>5} modules  on open: {heavy}; later: {later}")
+        for problem in found:
+            print("FAIL:", problem)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
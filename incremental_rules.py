@@ -0,0 +1,130 @@
+import hashlib
+import os
+import pickle
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from miner import count_itemsets, frequent_itemset_counts, generate_rules, itemset_frame, support_to_count
+
+
+# Mine the starting state; itemsets are tracked down to track_ratio * min_support so
+# items drifting around the threshold keep exact counts between updates
+def build_rule_state(matrix, items, min_support=0.01, min_lift=1.0, track_ratio=0.5, max_len=None):
+    n_baskets = matrix.shape[0]
+    track_support = min_support * track_ratio
+    state = {
+        "n_baskets": n_baskets,
+        "counts": frequent_itemset_counts(matrix, items, support_to_count(track_support, n_baskets), max_len),
+        "estimated": set(),
+        "min_support": min_support,
+        "min_lift": min_lift,
+        "track_support": track_support,
+        "max_len": max_len,
+    }
+    state["rule_keys"] = _rule_keys(current_rules(state))
+    return state
+
+
+# Frequent itemsets ('support', 'itemsets') at the state's min_support
+def frequent_itemsets(state):
+    min_count = support_to_count(state["min_support"], state["n_baskets"])
+    counts = {itemset: count for itemset, count in state["counts"].items() if count >= min_count}
+
+    # Rules need the support of every sub-itemset; drop anything whose subsets aren't all kept
+    for size in sorted({len(itemset) for itemset in counts})[1:]:
+        for itemset in [s for s in counts if len(s) == size]:
+            if any(itemset - {item} not in counts for item in itemset):
+                del counts[itemset]
+    return itemset_frame(counts, state["n_baskets"])
+
+
+# Rules for the current counts, same columns as miner.generate_rules
+def current_rules(state):
+    return generate_rules(frequent_itemsets(state), metric="lift", min_threshold=state["min_lift"])
+
+
+def _rule_keys(rules):
+    return set(zip(rules["antecedents"], rules["consequents"]))
+
+
+# Fold a new batch of baskets into the state without re-mining the old ones.
+# history: optional (matrix, items) of the baskets already in the state, scanned only to
+# get exact old counts for itemsets that were untracked before this batch; without it
+# those itemsets start from their batch count and are listed under "estimated".
+def update_rule_state(state, new_matrix, new_items, history=None):
+    n_old = state["n_baskets"]
+    n_total = n_old + new_matrix.shape[0]
+    track_support = state["track_support"]
+
+    # Tracked itemsets: add their counts in the new baskets
+    counts = dict(state["counts"])
+    for itemset, count in count_itemsets(new_matrix, new_items, counts.keys()).items():
+        counts[itemset] += count
+
+    # An untracked itemset was in at most old_bound old baskets, so it can only reach the
+    # tracking threshold if the batch alone holds the rest (FUP); mine the batch for those
+    old_bound = support_to_count(track_support, n_old) - 1 if n_old else 0
+    track_count = support_to_count(track_support, n_total)
+    local = frequent_itemset_counts(
+        new_matrix, new_items, max(track_count - old_bound, 1), state["max_len"]
+    ) if new_matrix.shape[0] else {}
+    candidates = {itemset: count for itemset, count in local.items() if itemset not in counts}
+
+    estimated = set(state["estimated"])
+    if candidates:
+        if history is not None:
+            old_counts = count_itemsets(history[0], history[1], candidates.keys())
+        else:
+            old_counts = dict.fromkeys(candidates, 0)
+            estimated.update(candidates)
+        for itemset, count in candidates.items():
+            counts[itemset] = count + old_counts[itemset]
+
+    counts = {itemset: count for itemset, count in counts.items() if count >= track_count}
+    new_state = dict(state, n_baskets=n_total, counts=counts, estimated=estimated & counts.keys())
+
+    rules = current_rules(new_state)
+    new_state["rule_keys"] = _rule_keys(rules)
+    entered = new_state["rule_keys"] - state["rule_keys"]
+    left = state["rule_keys"] - new_state["rule_keys"]
+    report = {
+        "rules": rules,
+        "entered": rules[[key in entered for key in zip(rules["antecedents"], rules["consequents"])]],
+        "left": pd.DataFrame(sorted(left, key=str), columns=["antecedents", "consequents"]),
+        "estimated": new_state["estimated"],
+    }
+    return new_state, report
+
+
+# Fingerprint of the first n baskets of a basket matrix, by item name, so it survives new
+# items shifting the (name-sorted) column ids; tells whether a file was only appended to
+def basket_digest(matrix, items, n=None):
+    n = matrix.shape[0] if n is None else n
+    matrix = matrix.tocsr()
+    codes = np.array([int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), "little")
+                      for item in items], dtype=np.uint64)
+    indptr = matrix.indptr[:n + 1].astype(np.int64)
+    h = hashlib.sha256(np.diff(indptr).tobytes())
+    h.update(codes[matrix.indices[indptr[0]:indptr[-1]]].tobytes())
+    return h.hexdigest()
+
+
+# Persist the itemset counts between runs; written to a temporary file and renamed over the
+# old state, so a crash mid-write leaves the previous state intact
+def save_rule_state(state, path):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_rule_state(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,156 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from functools import wraps
+
+
+# Off unless DMART_PROFILE is set: "1" records wall/CPU time and rows, "memory" adds the
+# tracemalloc peak of each stage. DMART_PROFILE_LOG appends every record to a JSON-lines file.
+# CPU time is the calling thread's, so work handed to a pool (n_jobs=-1) shows as wall time only.
+_config = {
+    "enabled": os.environ.get("DMART_PROFILE", "").lower() in ("1", "true", "memory"),
+    "memory": os.environ.get("DMART_PROFILE", "").lower() == "memory",
+    "log_path": os.environ.get("DMART_PROFILE_LOG") or None,
+}
+_records = deque(maxlen=5000)
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def configure(enabled=True, memory=False, log_path=None):
+    _config.update(enabled=enabled, memory=memory, log_path=log_path)
+    if not memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def enabled():
+    return _config["enabled"]
+
+
+class _NoStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set_rows(self, rows):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+# One timed stage; nested stages record their parent's name
+class _Stage:
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def set_rows(self, rows):
+        self.rows = rows
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault("stack", [])
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        self.inner_peak = 0
+        if _config["memory"]:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # There is one peak counter; each stage resets it and hands its own peak up to its
+            # parent on exit, so an outer stage still sees what its inner stages allocated
+            self.base = tracemalloc.get_traced_memory()[0]
+            if self.parent is not None:
+                self.parent.inner_peak = max(self.parent.inner_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        _local.stack.pop()
+        record = {
+            "stage": self.name,
+            "parent": self.parent.name if self.parent is not None else None,
+            "at": time.time(),
+            "wall_s": round(wall, 6),
+            "cpu_s": round(cpu, 6),
+            "rows": self.rows,
+            "peak_mb": None,
+            "error": exc_type.__name__ if exc_type else None,
+        }
+        if _config["memory"] and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1], self.inner_peak)
+            record["peak_mb"] = round(max(peak - self.base, 0) / 1024 ** 2, 3)
+            if self.parent is not None:
+                self.parent.inner_peak = max(self.parent.inner_peak, peak)
+        _record(record)
+        return False
+
+
+def _record(record):
+    with _lock:
+        _records.append(record)
+        if _config["log_path"]:
+            with open(_config["log_path"], "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+# Context manager timing a block: `with stage("mine_rules") as s: ...; s.set_rows(len(rules))`.
+# Returns a shared no-op when instrumentation is off.
+def stage(name, rows=None):
+    if not _config["enabled"]:
+        return _NO_STAGE
+    return _Stage(name, rows)
+
+
+# Decorator form of stage(); rows(result) (e.g. len) fills in the row count
+def timed(name, rows=None):
+    def decorate(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _config["enabled"]:
+                return func(*args, **kwargs)
+            with _Stage(name) as current:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    current.set_rows(rows(result))
+                return result
+        return wrapper
+    return decorate
+
+
+# Newest records first
+def recent(limit=200):
+    with _lock:
+        return list(_records)[::-1][:limit]
+
+
+# Count, total and worst wall/CPU time and the largest peak per stage, slowest total first
+def summary():
+    totals = {}
+    for record in recent(len(_records)):
+        entry = totals.setdefault(record["stage"], {
+            "stage": record["stage"], "calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0,
+            "peak_mb": None, "rows": None,
+        })
+        entry["calls"] += 1
+        entry["wall_s"] += record["wall_s"]
+        entry["cpu_s"] += record["cpu_s"]
+        entry["max_wall_s"] = max(entry["max_wall_s"], record["wall_s"])
+        if record["peak_mb"] is not None:
+            entry["peak_mb"] = max(entry["peak_mb"] or 0.0, record["peak_mb"])
+        if entry["rows"] is None:
+            entry["rows"] = record["rows"]  # rows of the latest call
+    return sorted(totals.values(), key=lambda entry: entry["wall_s"], reverse=True)
+
+
+def clear():
+    with _lock:
+        _records.clear()
@@ -0,0 +1,68 @@
+import numpy as np
+from scipy import sparse
+
+
+MEASURES = ("cosine", "jaccard", "lift")
+
+
+# Item-item similarity from a baskets x items matrix (basket_matrix / load_basket_matrix), kept
+# only as each item's top k neighbours: neighbors[i] are item ids, best first, padded with -1.
+# Co-occurrence counts come from B.T @ B, one block of item columns at a time, so memory is
+# bounded by block_size x items however many items there are.
+# min_count drops pairs seen together fewer times than that.
+def build_similarity_index(matrix, items, k=20, measure="cosine", min_count=1, block_size=2048):
+    if measure not in MEASURES:
+        raise ValueError(f"Unknown measure '{measure}', expected one of {MEASURES}")
+
+    baskets = sparse.csc_matrix(matrix, dtype=np.float32)
+    n_baskets, n_items = baskets.shape
+    counts = np.asarray(baskets.sum(axis=0)).ravel()
+    neighbors = np.full((n_items, k), -1, dtype=np.int32)
+    scores = np.zeros((n_items, k), dtype=np.float32)
+    baskets_t = baskets.T.tocsr()
+
+    for start in range(0, n_items, block_size):
+        stop = min(start + block_size, n_items)
+        # Column j of the block: how often each item was bought with item start + j
+        block = (baskets_t @ baskets[:, start:stop]).tocoo()
+        rows, cols, together = block.row, block.col + start, block.data
+        keep = (rows != cols) & (together >= min_count)
+        rows, cols, together = rows[keep], cols[keep], together[keep]
+
+        if measure == "cosine":
+            score = together / np.sqrt(counts[rows] * counts[cols])
+        elif measure == "jaccard":
+            score = together / (counts[rows] + counts[cols] - together)
+        else:
+            score = together * n_baskets / (counts[rows] * counts[cols])
+
+        # Best k per item of the block: sort by (item, -score, neighbour), keep each item's first k
+        order = np.lexsort((rows, -score, cols))
+        cols, rows, score = cols[order], rows[order], score[order]
+        first = np.searchsorted(cols, np.arange(start, stop + 1))
+        rank = np.arange(len(cols)) - np.repeat(first[:-1], np.diff(first))
+        top = rank < k
+        neighbors[cols[top], rank[top]] = rows[top]
+        scores[cols[top], rank[top]] = score[top]
+
+    return {"items": list(items), "item_ids": {item: i for i, item in enumerate(items)},
+            "neighbors": neighbors, "scores": scores, "counts": counts.astype(np.int64),
+            "measure": measure, "k": k}
+
+
+# Up to top_n most similar items of a product; [] for a product never seen in a basket
+def similar_items(index, product, top_n=5):
+    i = index["item_ids"].get(product)
+    if i is None:
+        return []
+    items = index["items"]
+    return [items[j] for j in index["neighbors"][i, :top_n] if j >= 0]
+
+
+# Neighbours with their scores, e.g. for display
+def similar_items_with_scores(index, product, top_n=5):
+    i = index["item_ids"].get(product)
+    if i is None:
+        return []
+    items = index["items"]
+    return [(items[j], float(s)) for j, s in zip(index["neighbors"][i, :top_n], index["scores"][i, :top_n]) if j >= 0]
@@ -0,0 +1,216 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from instrumentation import stage
+
+
+RULE_COLUMNS = [
+    "antecedents", "consequents", "antecedent support", "consequent support",
+    "support", "confidence", "lift", "leverage", "conviction",
+]
+
+
+# Encode baskets (lists of product names) as a sparse baskets x products matrix
+def encode_transactions(transactions):
+    vocab = {}
+    indptr = [0]
+    indices = []
+    for basket in transactions:
+        ids = {vocab.setdefault(item, len(vocab)) for item in basket}
+        indices.extend(ids)
+        indptr.append(len(indices))
+    return basket_matrix(np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64), vocab)
+
+
+# CSR matrix from interned ids (vocab maps name -> id); columns are reordered by sorted name,
+# like TransactionEncoder
+def basket_matrix(indices, indptr, vocab):
+    items = sorted(vocab)
+    remap = np.empty(len(vocab), dtype=np.int32)
+    remap[[vocab[item] for item in items]] = np.arange(len(items), dtype=np.int32)
+    indices = remap[indices] if len(indices) else np.empty(0, dtype=np.int32)
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(indices), dtype=bool), indices, indptr),
+        shape=(len(indptr) - 1, len(items)),
+    )
+    matrix.sort_indices()
+    return matrix, items
+
+
+# Intersect two sorted tid-lists
+def _intersect(a, b):
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return a
+    positions = np.searchsorted(b, a).clip(max=len(b) - 1)
+    return a[b[positions] == a]
+
+
+# Eclat over vertical tid-lists; only the tid-lists on the current search path are held in memory
+def _eclat(matrix, min_count, max_len):
+    csc = sparse.csc_matrix(matrix)
+    csc.sort_indices()
+    counts = np.diff(csc.indptr)
+
+    # Least frequent items first keeps the intersected tid-lists short
+    frequent = [item for item in np.argsort(counts, kind="mergesort") if counts[item] >= min_count]
+    roots = [(item, csc.indices[csc.indptr[item]:csc.indptr[item + 1]]) for item in frequent]
+
+    found = []
+    stack = [((), roots)]
+    while stack:
+        prefix, candidates = stack.pop()
+        for i, (item, tids) in enumerate(candidates):
+            itemset = prefix + (item,)
+            found.append((itemset, len(tids)))
+            if max_len is not None and len(itemset) >= max_len:
+                continue
+            extensions = []
+            for other, other_tids in candidates[i + 1:]:
+                common = _intersect(tids, other_tids)
+                if len(common) >= min_count:
+                    extensions.append((other, common))
+            if extensions:
+                stack.append((itemset, extensions))
+    return found
+
+
+def _mlxtend_frame(matrix, items):
+    return pd.DataFrame.sparse.from_spmatrix(sparse.csc_matrix(matrix, dtype=bool), columns=items)
+
+
+def _fpgrowth(matrix, items, min_support, max_len):
+    from mlxtend.frequent_patterns import fpgrowth
+    return fpgrowth(_mlxtend_frame(matrix, items), min_support=min_support, use_colnames=True, max_len=max_len)
+
+
+def _apriori(matrix, items, min_support, max_len):
+    from mlxtend.frequent_patterns import apriori
+    return apriori(_mlxtend_frame(matrix, items), min_support=min_support, use_colnames=True, max_len=max_len)
+
+
+ENGINES = ("eclat", "fpgrowth", "apriori")
+
+
+# Frequent itemsets in the same shape as mlxtend: columns 'support' and 'itemsets' (frozensets of names)
+def mine_frequent_itemsets(matrix, items, min_support=0.01, engine="eclat", max_len=None):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown mining engine '{engine}', expected one of {ENGINES}")
+
+    n_baskets = matrix.shape[0]
+    if n_baskets == 0:
+        return pd.DataFrame(columns=["support", "itemsets"])
+
+    if engine == "fpgrowth":
+        return _fpgrowth(matrix, items, min_support, max_len)
+    if engine == "apriori":
+        return _apriori(matrix, items, min_support, max_len)
+
+    # Small tolerance so e.g. 0.07 * 100 still means 7 baskets
+    counts = frequent_itemset_counts(matrix, items, support_to_count(min_support, n_baskets), max_len)
+    return itemset_frame(counts, n_baskets)
+
+
+# Minimum basket count for a support threshold; small tolerance so e.g. 0.07 * 100 still means 7
+def support_to_count(min_support, n_baskets):
+    return max(int(np.ceil(min_support * n_baskets - 1e-9)), 1)
+
+
+# Absolute counts of every itemset seen in at least min_count baskets, keyed by frozenset of names
+def frequent_itemset_counts(matrix, items, min_count, max_len=None):
+    found = _eclat(matrix, min_count, max_len)
+    return {frozenset(items[i] for i in itemset): count for itemset, count in found}
+
+
+# Exact counts of the given itemsets (frozensets of names) in a basket matrix
+def count_itemsets(matrix, items, itemsets):
+    csc = sparse.csc_matrix(matrix)
+    csc.sort_indices()
+    column = {item: i for i, item in enumerate(items)}
+    empty = np.empty(0, dtype=csc.indices.dtype)
+
+    # Shorter itemsets first so a requested prefix's tid-list is reused
+    prefix_tids = {}
+    counts = {}
+    for itemset in sorted(itemsets, key=len):
+        key = tuple(sorted(itemset))
+        current = prefix_tids.get(key[:-1])
+        if current is None:
+            current = _item_tids(csc, column, key[0], empty)
+            for item in key[1:-1]:
+                current = _intersect(current, _item_tids(csc, column, item, empty))
+        if len(key) > 1:
+            current = _intersect(current, _item_tids(csc, column, key[-1], empty))
+        prefix_tids[key] = current
+        counts[itemset] = len(current)
+    return counts
+
+
+def _item_tids(csc, column, item, empty):
+    i = column.get(item)
+    if i is None:
+        return empty
+    return csc.indices[csc.indptr[i]:csc.indptr[i + 1]]
+
+
+# Frequent-itemset frame ('support', 'itemsets') from absolute counts
+def itemset_frame(counts, n_baskets):
+    ordered = sorted(counts.items(), key=lambda entry: len(entry[0]))
+    return pd.DataFrame({
+        "support": np.array([count for _, count in ordered], dtype=float) / max(n_baskets, 1),
+        "itemsets": [itemset for itemset, _ in ordered],
+    })
+
+
+# Association rules with the same columns the dashboard reads from mlxtend.association_rules
+def generate_rules(frequent_itemsets, metric="lift", min_threshold=1.0):
+    if frequent_itemsets.empty:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+
+    support_of = dict(zip(frequent_itemsets["itemsets"], frequent_itemsets["support"]))
+    antecedents, consequents, supports = [], [], []
+    for itemset, support in support_of.items():
+        if len(itemset) < 2:
+            continue
+        for size in range(1, len(itemset)):
+            for antecedent in combinations(itemset, size):
+                antecedent = frozenset(antecedent)
+                antecedents.append(antecedent)
+                consequents.append(itemset - antecedent)
+                supports.append(support)
+
+    support = np.array(supports, dtype=float)
+    antecedent_support = np.array([support_of[a] for a in antecedents], dtype=float)
+    consequent_support = np.array([support_of[c] for c in consequents], dtype=float)
+    confidence = support / antecedent_support
+    lift = confidence / consequent_support
+    with np.errstate(divide="ignore", invalid="ignore"):
+        conviction = np.where(confidence < 1, (1 - consequent_support) / (1 - confidence), np.inf)
+
+    rules = pd.DataFrame({
+        "antecedents": antecedents,
+        "consequents": consequents,
+        "antecedent support": antecedent_support,
+        "consequent support": consequent_support,
+        "support": support,
+        "confidence": confidence,
+        "lift": lift,
+        "leverage": support - antecedent_support * consequent_support,
+        "conviction": conviction,
+    }, columns=RULE_COLUMNS)
+    if metric not in rules.columns:
+        raise ValueError(f"Unknown rule metric '{metric}'")
+    return rules[rules[metric] >= min_threshold].reset_index(drop=True)
+
+
+# Frequent itemsets and rules in one call, with the parameters the dashboard uses
+def mine_rules(matrix, items, min_support=0.01, engine="eclat", metric="lift", min_threshold=1.0):
+    with stage(f"frequent_itemsets:{engine}", rows=matrix.shape[0]):
+        frequent_itemsets = mine_frequent_itemsets(matrix, items, min_support=min_support, engine=engine)
+    with stage("association_rules", rows=len(frequent_itemsets)):
+        return generate_rules(frequent_itemsets, metric=metric, min_threshold=min_threshold)
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import pickle
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+
+# Candidate (p, d, q) orders, tried in this order until the per-series time budget runs out
+ARIMA_ORDERS = [(1, 1, 1), (0, 1, 1), (1, 1, 0), (2, 1, 1), (1, 1, 2), (0, 1, 0)]
+
+
+# Monthly quantity per series: one row per key (e.g. Name, or Name + Location), one column
+# per month, months without sales filled with 0
+def monthly_panel(sales, keys=("Name",), freq="ME"):
+    keys = list(keys)
+    grouped = sales.groupby(keys + [pd.Grouper(key="Date", freq=freq)], observed=True)["Quantity"].sum()
+    panel = grouped.unstack("Date", fill_value=0)
+    months = pd.date_range(panel.columns.min(), panel.columns.max(), freq=freq)
+    return panel.reindex(columns=months, fill_value=0).astype(float)
+
+
+# Simple exponential smoothing over every row at once; the forecast is the last level
+def exponential_smoothing(values, steps, alpha=0.3):
+    level = values[:, 0].copy()
+    for t in range(1, values.shape[1]):
+        level = alpha * values[:, t] + (1 - alpha) * level
+    return np.repeat(level[:, None], steps, axis=1)
+
+
+# Repeat the same months of the last season; rows shorter than a season fall back to the last value
+def seasonal_naive(values, steps, season=12):
+    if values.shape[1] < season:
+        return np.repeat(values[:, -1:], steps, axis=1)
+    last_season = values[:, -season:]
+    return last_season[:, np.arange(steps) % season]
+
+
+FALLBACKS = {"ses": exponential_smoothing, "seasonal_naive": seasonal_naive}
+
+
+# Best ARIMA order by AIC among those tried within time_budget seconds (at least one is tried)
+def fit_series(values, steps, orders=ARIMA_ORDERS, time_budget=2.0):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    start = time.perf_counter()
+    best = None
+    for order in orders:
+        if best is not None and time.perf_counter() - start > time_budget:
+            break
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                fit = ARIMA(values, order=order).fit()
+        except Exception:
+            continue
+        if best is None or fit.aic < best["aic"]:
+            best = {
+                "method": "arima",
+                "order": order,
+                "aic": float(fit.aic),
+                "params": fit.params,
+                "forecast": np.asarray(fit.forecast(steps=steps), dtype=float),
+            }
+    return best
+
+
+# Worker entry point: fits one chunk of series in a separate process
+def _fit_chunk(chunk, steps, orders, time_budget):
+    return [(key, fit_series(values, steps, orders, time_budget)) for key, values in chunk]
+
+
+# Identifies a series' history and every setting that decides how it is forecast, so changing
+# min_obs / min_nonzero or the fallback refits instead of reusing the old forecast
+def _digest(values, steps, orders, settings):
+    h = hashlib.sha1(np.ascontiguousarray(values).tobytes())
+    h.update(repr((steps, orders, settings)).encode())
+    return h.hexdigest()
+
+
+# Forecast every row of a monthly panel.
+# Series with fewer than min_obs months or fewer than min_nonzero selling months get the
+# vectorized fallback; the rest are fitted with ARIMA in a process pool (workers=1 runs inline).
+# state: the state returned by a previous call; series whose history hasn't changed reuse
+# their stored fit instead of being refitted.
+def forecast_panel(panel, steps=2, state=None, workers=None, time_budget=2.0, orders=ARIMA_ORDERS,
+                   min_obs=12, min_nonzero=6, fallback="ses", chunk_size=50):
+    if fallback not in FALLBACKS:
+        raise ValueError(f"Unknown fallback '{fallback}', expected one of {tuple(FALLBACKS)}")
+
+    values = panel.to_numpy(dtype=float)
+    keys = list(panel.index)
+    previous = (state or {}).get("series", {})
+    settings = (min_obs, min_nonzero, fallback)
+    digests = [_digest(row, steps, orders, settings) for row in values]
+    series = {}
+
+    dense = (values.shape[1] >= min_obs) & ((values > 0).sum(axis=1) >= min_nonzero)
+    to_fit = []
+    for i, key in enumerate(keys):
+        old = previous.get(key)
+        if old is not None and old["digest"] == digests[i]:
+            series[key] = old
+        elif dense[i]:
+            to_fit.append(i)
+
+    fitted = _fit_all([(keys[i], values[i]) for i in to_fit], steps, orders, time_budget, workers, chunk_size)
+    for i in to_fit:
+        if fitted.get(keys[i]) is not None:
+            series[keys[i]] = dict(fitted[keys[i]], digest=digests[i])
+
+    # Sparse series and series ARIMA couldn't fit, all at once
+    rest = [i for i, key in enumerate(keys) if key not in series]
+    if rest:
+        forecasts = FALLBACKS[fallback](values[rest], steps)
+        for row, i in enumerate(rest):
+            series[keys[i]] = {"method": fallback, "order": None, "aic": None, "params": None,
+                               "forecast": forecasts[row], "digest": digests[i]}
+
+    last_month = panel.columns[-1] if len(panel.columns) else pd.Timestamp.now().normalize()
+    future = pd.date_range(last_month, periods=steps + 1, freq=panel.columns.freq or "ME")[1:]
+    return {"series": series, "steps": steps, "future": future, "index_names": list(panel.index.names)}
+
+
+def _fit_all(items, steps, orders, time_budget, workers, chunk_size):
+    if not items:
+        return {}
+    workers = workers or os.cpu_count() or 1
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    if workers == 1 or len(chunks) == 1:
+        results = [_fit_chunk(chunk, steps, orders, time_budget) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_chunk, chunks, [steps] * len(chunks),
+                                    [orders] * len(chunks), [time_budget] * len(chunks)))
+    return {key: fit for chunk in results for key, fit in chunk}
+
+
+# Forecasts as a frame: one row per series, one column per future month, plus Method and Order
+def forecast_frame(state):
+    keys = list(state["series"].keys())
+    forecasts = np.array([state["series"][key]["forecast"] for key in keys]).reshape(len(keys), state["steps"])
+    index = pd.MultiIndex.from_tuples(keys, names=state["index_names"]) if len(state["index_names"]) > 1 \
+        else pd.Index(keys, name=state["index_names"][0])
+    frame = pd.DataFrame(forecasts, index=index, columns=state["future"])
+    frame["Method"] = [state["series"][key]["method"] for key in keys]
+    frame["Order"] = [state["series"][key]["order"] for key in keys]
+    return frame
+
+
+# Persist the fitted state so the next run only refits series with new data
+def save_forecast_state(state, path):
+    with open(path, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_forecast_state(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
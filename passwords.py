@@ -0,0 +1,39 @@
+import base64
+import hashlib
+import hmac
+import os
+
+ALGORITHM = 'pbkdf2_sha256'
+
+# PBKDF2 work factor for new hashes; stored hashes with a different count are upgraded on login
+ITERATIONS = int(os.environ.get('DMART_PASSWORD_ITERATIONS', 200_000))
+
+def _b64(raw):
+    return base64.b64encode(raw).decode('ascii')
+
+# Salted PBKDF2-SHA256, stored as "pbkdf2_sha256$<iterations>$<salt>$<hash>"
+def hash_password(password, iterations=None):
+    iterations = iterations or ITERATIONS
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(digest)}"
+
+# The unsalted SHA-256 hex digest older accounts were stored with
+def legacy_hash(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+# (matches, needs_rehash): legacy SHA-256 rows and rows hashed at another cost need a rehash
+def verify_password(password, stored, iterations=None):
+    iterations = iterations or ITERATIONS
+    if not stored:
+        return False, False
+    if not stored.startswith(ALGORITHM + '$'):
+        return hmac.compare_digest(legacy_hash(password), stored), True
+    try:
+        _, rounds, salt, expected = stored.split('$')
+        rounds = int(rounds)
+        salt, expected = base64.b64decode(salt), base64.b64decode(expected)
+    except ValueError:
+        return False, False
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, rounds)
+    return hmac.compare_digest(digest, expected), rounds != iterations
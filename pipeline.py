@@ -0,0 +1,224 @@
+"""Headless batch job that precomputes every dashboard artifact.
+
+    python pipeline.py --data-dir "E:/be project final"
+
+Mines the association rules, fits the ARIMA and hybrid forecasts and builds the overview
+sales cube and summary metrics, then publishes them as a new version under artifacts/. The Streamlit
+pages read the latest published version, so this can run nightly from cron.
+
+With --incremental STATE the rules are updated from the itemset counts saved in STATE by the
+previous run, folding in only the baskets appended to the file since then, and the rules that
+entered or left are published as rule_changes. STATE is only rewritten once the new version has
+been published, and is rebuilt if the file was changed other than by appending.
+--verify-incremental re-mines the whole file as well and fails the run if the two rule sets differ.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from artifact_cache import file_digest
+from artifact_store import ARTIFACT_ROOT, load_published, publish_artifacts
+from backtest import backtest_arima, backtest_hybrid, summarize
+from basket_loader import load_basket_matrix
+from dashboard_metrics import load_catalog, load_location_sales, location_kpis, location_summary
+from data_store import BASKETS_FILE, DATA_DIR, DATASETS, ensure_columnar, read_table
+from forecasting import ARIMA_ORDER, FORECAST_STEPS, HYBRID_PARAMS, fit_arima, fit_hybrid
+from incremental_rules import (basket_digest, build_rule_state, current_rules, load_rule_state, save_rule_state,
+                               update_rule_state)
+from item_similarity import build_similarity_index
+from miner import ENGINES, mine_rules
+from multi_forecast import forecast_panel, monthly_panel
+from product_dim import build_product_dimension
+from product_search import build_search_index
+from rule_index import build_rule_index
+from sales_cube import build_sales_cube
+
+
+INPUT_FILES = dict({name: spec["file"] for name, spec in DATASETS.items()}, baskets=BASKETS_FILE)
+
+log = logging.getLogger("pipeline")
+
+
+def _timed(name, step, timings):
+    start = time.perf_counter()
+    value = step()
+    timings[name] = round(time.perf_counter() - start, 3)
+    log.info("%s done in %.2fs", name, timings[name])
+    return value
+
+
+# The rule state saved at state_path, or None when there is none or it doesn't fit this basket
+# file: another min_support, or its first n_baskets rows no longer being the baskets it counted
+# (the file was rewritten rather than appended to)
+def _load_rule_state(state_path, matrix, items, min_support):
+    if not os.path.exists(state_path):
+        return None
+    state = load_rule_state(state_path)
+    if (state["min_support"] != min_support or state["n_baskets"] > matrix.shape[0]
+            or state.get("basket_digest") != basket_digest(matrix, items, state["n_baskets"])):
+        log.warning("rule state %s does not match the basket file; rebuilding it", state_path)
+        return None
+    return state
+
+
+# Rules kept up to date from the counts saved at state_path: rows past the state's n_baskets
+# are the new baskets. Without a usable state it is rebuilt from scratch. Returns the rules,
+# the rule changes (None after a rebuild) and the new state, which the caller saves only once
+# the run has published, so a failed run reports the same batch again next time.
+def _incremental_rules(matrix, items, state_path, min_support):
+    state = _load_rule_state(state_path, matrix, items, min_support)
+
+    if state is None:
+        state = build_rule_state(matrix, items, min_support=min_support)
+        rules, changes = current_rules(state), None
+    else:
+        n_old = state["n_baskets"]
+        state, report = update_rule_state(state, matrix[n_old:], items, history=(matrix[:n_old], items))
+        rules = report["rules"]
+        changes = {"baskets": matrix.shape[0] - n_old, "entered": report["entered"], "left": report["left"]}
+        log.info("%d new baskets: %d rules entered, %d left", changes["baskets"], len(changes["entered"]),
+                 len(changes["left"]))
+    state["basket_digest"] = basket_digest(matrix, items)
+    return rules, changes, state
+
+
+# Column(s) that put the hybrid feature rows in time order, or None when there are none:
+# a month or weekday on its own wraps around and says nothing about which row came first.
+# The rows are all numeric model features, so a date has to come as Year and Month.
+def _hybrid_time_column(df):
+    if {"Year", "Month"} <= set(df.columns):
+        return ["Year", "Month"]
+    return None
+
+
+# Fails the run when the incrementally maintained rules differ from a full re-mine
+def _verify_rules(rules, matrix, items, min_support, engine):
+    full = mine_rules(matrix, items, min_support=min_support, engine=engine)
+    keyed = {(a, c): s for a, c, s in zip(rules["antecedents"], rules["consequents"], rules["support"])}
+    expected = {(a, c): s for a, c, s in zip(full["antecedents"], full["consequents"], full["support"])}
+    if keyed.keys() != expected.keys() or any(abs(keyed[k] - expected[k]) > 1e-12 for k in expected):
+        raise RuntimeError(f"incremental rules ({len(keyed)}) differ from a full re-mine ({len(expected)})")
+    log.info("incremental rules match a full re-mine (%d rules)", len(expected))
+
+
+def run_pipeline(data_dir=DATA_DIR, out_dir=ARTIFACT_ROOT, min_support=0.01, engine="eclat", keep=3,
+                 workers=None, forecast_budget=2.0, backtest_folds=5, incremental=None, verify_incremental=False):
+    paths = {key: os.path.join(data_dir, name) for key, name in INPUT_FILES.items()}
+    timings = {}
+    artifacts = {}
+
+    matrix, items = _timed("load_baskets", lambda: load_basket_matrix(paths["baskets"]), timings)
+    rule_state = None
+    if incremental:
+        rules, changes, rule_state = _timed("update_rules", lambda: _incremental_rules(matrix, items, incremental, min_support),
+                                timings)
+        if changes is not None:
+            artifacts["rule_changes"] = changes
+        if verify_incremental:
+            _timed("verify_rules", lambda: _verify_rules(rules, matrix, items, min_support, engine), timings)
+    else:
+        rules = _timed("mine_rules", lambda: mine_rules(matrix, items, min_support=min_support, engine=engine),
+                       timings)
+    artifacts["rules"] = rules
+    artifacts["rule_index"] = _timed("rule_index", lambda: build_rule_index(rules), timings)
+    artifacts["item_similarity"] = _timed(
+        "item_similarity", lambda: build_similarity_index(matrix, items, k=20, measure="cosine"), timings)
+
+    # Refresh the columnar copies first so the pages never pay for CSV parsing
+    _timed("columnar", lambda: [ensure_columnar(name, data_dir) for name in DATASETS], timings)
+
+    sales = _timed("load_sales", lambda: read_table("sales", columns=["Date", "Quantity"], data_dir=data_dir), timings)
+    artifacts["arima"] = _timed("fit_arima", lambda: fit_arima(sales, ARIMA_ORDER, FORECAST_STEPS), timings)
+
+    hybrid_df = _timed("load_hybrid", lambda: read_table("hybrid", data_dir=data_dir), timings)
+    artifacts["hybrid"] = _timed("fit_hybrid", lambda: fit_hybrid(hybrid_df, **HYBRID_PARAMS), timings)
+
+    # Out-of-sample accuracy from rolling-origin folds; fold results are cached between runs
+    if backtest_folds:
+        arima_folds = _timed("backtest_arima", lambda: backtest_arima(
+            sales, ARIMA_ORDER, FORECAST_STEPS, workers=workers), timings)
+        time_column = _hybrid_time_column(hybrid_df)
+        if time_column is None:
+            log.warning("hybrid data has no Year and Month columns, so its rows have no time order; "
+                        "skipping the hybrid backtest")
+            hybrid_folds = None
+        else:
+            hybrid_folds = _timed("backtest_hybrid", lambda: backtest_hybrid(
+                hybrid_df, n_folds=backtest_folds, time_column=time_column,
+                n_estimators=HYBRID_PARAMS["n_estimators"], random_state=HYBRID_PARAMS["random_state"],
+                workers=workers), timings)
+        artifacts["backtest"] = {"arima": arima_folds, "arima_summary": summarize(arima_folds),
+                                 "hybrid": hybrid_folds, "hybrid_time_column": time_column}
+
+    location_sales = _timed("load_location_sales", lambda: load_location_sales(data_dir=data_dir), timings)
+    catalog = _timed("load_catalog", lambda: load_catalog(data_dir=data_dir), timings)
+    products = _timed("product_dimension", lambda: build_product_dimension(catalog), timings)
+    artifacts["products"] = products
+    cube = _timed("sales_cube", lambda: build_sales_cube(location_sales, products), timings)
+    artifacts["sales_cube"] = cube
+    artifacts["product_search"] = _timed("product_search", lambda: build_search_index(
+        products, set(items) | set(cube["cube"]["Name"].cat.categories)), timings)
+    artifacts["location_summary"] = _timed("location_summary", lambda: location_summary(cube), timings)
+    artifacts["location_kpis"] = _timed("location_kpis", lambda: location_kpis(cube), timings)
+
+    # Per product and location forecasts; series unchanged since the last published run keep their fit
+    panel = _timed("sku_panel", lambda: monthly_panel(location_sales, keys=("Name", "Location")), timings)
+    artifacts["sku_forecasts"] = _timed("sku_forecasts", lambda: forecast_panel(
+        panel, FORECAST_STEPS, state=load_published("sku_forecasts", root=out_dir),
+        workers=workers, time_budget=forecast_budget,
+    ), timings)
+
+    manifest = {
+        "inputs": {key: {"path": path, "sha256": file_digest(path)} for key, path in paths.items()},
+        "params": {
+            "min_support": min_support,
+            "engine": engine,
+            "arima_order": ARIMA_ORDER,
+            "forecast_steps": FORECAST_STEPS,
+            "hybrid": HYBRID_PARAMS,
+            "forecast_budget": forecast_budget,
+            "backtest_folds": backtest_folds,
+            "incremental": incremental,
+        },
+        "timings": timings,
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    version = publish_artifacts(artifacts, manifest, root=out_dir, keep=keep)
+    if rule_state is not None:
+        save_rule_state(rule_state, incremental)
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the D-Mart dashboard artifacts.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="directory holding the input CSV files")
+    parser.add_argument("--out-dir", default=ARTIFACT_ROOT, help="where versioned artifacts are published")
+    parser.add_argument("--min-support", type=float, default=0.01)
+    parser.add_argument("--engine", choices=ENGINES, default="eclat", help="frequent-itemset engine")
+    parser.add_argument("--keep", type=int, default=3, help="number of published versions to keep")
+    parser.add_argument("--workers", type=int, default=None, help="processes for per-SKU forecasting (default: all cores)")
+    parser.add_argument("--forecast-budget", type=float, default=2.0, help="seconds of ARIMA order search per series")
+    parser.add_argument("--backtest-folds", type=int, default=5, help="hybrid backtest folds (0 skips backtesting)")
+    parser.add_argument("--incremental", metavar="STATE", default=None,
+                        help="update the rules from the itemset counts saved in STATE instead of re-mining")
+    parser.add_argument("--verify-incremental", action="store_true",
+                        help="with --incremental, also re-mine every basket and fail if the rules differ")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        version = run_pipeline(
+            args.data_dir, args.out_dir, args.min_support, args.engine, args.keep,
+            args.workers, args.forecast_budget, args.backtest_folds, args.incremental, args.verify_incremental,
+        )
+    except Exception:
+        log.exception("pipeline failed; the previously published artifacts are unchanged")
+        return 1
+    log.info("published artifacts version %s to %s", version, args.out_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
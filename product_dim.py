@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+
+ATTRIBUTES = ["Brand", "Category", "SubCategory", "UnitPrice", "DicountPrice", "Quantity"]
+
+
+# One row per product name with a stable integer id (position in sorted name order).
+# The catalog lists some names several times at different pack sizes; the row with the
+# lowest Sr.No wins, and "Variants" records how many rows shared the name.
+# Text attributes are kept as categoricals, so an id -> attribute lookup is a code gather.
+def build_product_dimension(catalog):
+    order = ["Name", "Sr.No"] if "Sr.No" in catalog.columns else ["Name"]
+    rows = catalog.dropna(subset=["Name"]).astype({"Name": object}).sort_values(order, kind="mergesort")
+    variants = rows.groupby("Name", sort=True).size()
+    rows = rows.drop_duplicates("Name", keep="first").reset_index(drop=True)
+
+    attributes = {"Name": pd.Categorical(rows["Name"], categories=rows["Name"])}
+    for column in ATTRIBUTES:
+        if column not in rows.columns:
+            continue
+        values = rows[column]
+        if pd.api.types.is_numeric_dtype(values) and not isinstance(values.dtype, pd.CategoricalDtype):
+            attributes[column] = values.to_numpy(dtype=float)
+        else:
+            attributes[column] = pd.Categorical(values.astype(object))
+    attributes["Variants"] = variants.reindex(rows["Name"]).to_numpy()
+    return {"lookup": pd.Index(rows["Name"]), "attributes": attributes}
+
+
+def product_count(products):
+    return len(products["lookup"])
+
+
+# Product ids for a column of names; -1 where the name isn't in the catalog.
+# For a categorical column only its categories are looked up, then the codes are gathered.
+def product_ids(products, names):
+    if isinstance(getattr(names, "dtype", None), pd.CategoricalDtype):
+        category_ids = products["lookup"].get_indexer(names.cat.categories)
+        codes = names.cat.codes.to_numpy()
+        return np.where(codes >= 0, category_ids[codes], -1)
+    return products["lookup"].get_indexer(pd.Index(names, dtype=object))
+
+
+# Attribute values for an id array (missing for -1); an integer gather, no string join
+def gather(products, ids, column):
+    values = products["attributes"][column]
+    ids = np.asarray(ids)
+    missing = ids < 0
+    safe = np.where(missing, 0, ids)
+    if isinstance(values, pd.Categorical):
+        codes = values.codes[safe] if len(values) else np.zeros(len(ids), dtype=np.int8)
+        return pd.Categorical.from_codes(np.where(missing, -1, codes), dtype=values.dtype)
+    result = values[safe].astype(float) if len(values) else np.zeros(len(ids))
+    result[missing] = np.nan
+    return result
+
+
+# Copy of df with ProductId and the requested catalog attributes added, one output row per input row
+def attach_attributes(df, products, columns, name_column="Name"):
+    ids = product_ids(products, df[name_column])
+    out = df.assign(ProductId=ids)
+    for column in columns:
+        out[column] = gather(products, ids, column)
+    return out
@@ -0,0 +1,142 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+
+
+# Field weights: a hit in the name counts more than one in the brand or category
+FIELDS = {"Name": 1.0, "Brand": 0.6, "Category": 0.4, "SubCategory": 0.4}
+# Match kinds, best first: the whole token, a prefix of it, a token within edit distance
+EXACT, PREFIX, FUZZY = 3.0, 2.0, 1.0
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text).lower())
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Search index over product names (and catalog Brand/Category/SubCategory when given):
+#   vocab      sorted distinct tokens, so a prefix is a searchsorted range
+#   postings   CSR token -> (product id, field weight), best weight per product kept
+#   trigrams   trigram -> token ids, to find candidates for typo-tolerant matching
+# names: extra product names without catalog attributes (e.g. basket items missing from it).
+def build_search_index(products=None, names=()):
+    attributes = products["attributes"] if products is not None else {}
+    all_names = list(products["lookup"]) if products is not None else []
+    known = set(all_names)
+    all_names += sorted({name for name in names if name not in known})
+
+    weights = defaultdict(dict)  # token -> {product id: best field weight}
+    for field, weight in FIELDS.items():
+        if field == "Name":
+            values = all_names
+        elif field in attributes:
+            values = list(np.asarray(attributes[field], dtype=object))
+        else:
+            continue
+        for product, value in enumerate(values):
+            if value is None or value != value:  # missing attribute
+                continue
+            for token in tokenize(value):
+                by_product = weights[token]
+                if by_product.get(product, 0.0) < weight:
+                    by_product[product] = weight
+
+    vocab = sorted(weights)
+    indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum([len(weights[token]) for token in vocab], out=indptr[1:])
+    postings = np.fromiter((p for token in vocab for p in weights[token]), dtype=np.int32, count=int(indptr[-1]))
+    posting_weights = np.fromiter((w for token in vocab for w in weights[token].values()),
+                                  dtype=np.float32, count=int(indptr[-1]))
+
+    trigrams = defaultdict(list)
+    for token_id, token in enumerate(vocab):
+        for gram in _trigrams(token):
+            trigrams[gram].append(token_id)
+
+    return {"names": all_names, "name_ids": {name: i for i, name in enumerate(all_names)},
+            "vocab": np.asarray(vocab, dtype=object), "indptr": indptr, "postings": postings,
+            "weights": posting_weights, "trigrams": dict(trigrams),
+            "name_length": np.array([len(name) for name in all_names], dtype=np.int32)}
+
+
+# Levenshtein distance, or limit + 1 as soon as it must exceed limit
+def _edit_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+# (token id, match score) for every vocabulary token a query token matches
+def _matching_tokens(index, token, fuzzy=True):
+    vocab = index["vocab"]
+    start = int(np.searchsorted(vocab, token, side="left"))
+    stop = int(np.searchsorted(vocab, token + "￿", side="left"))
+    matches = {token_id: (EXACT if vocab[token_id] == token else PREFIX) for token_id in range(start, stop)}
+
+    limit = 0 if len(token) < 4 else 1 if len(token) < 8 else 2
+    if fuzzy and limit:
+        # Candidates share at least a third of the query's trigrams
+        counts = defaultdict(int)
+        grams = _trigrams(token)
+        for gram in grams:
+            for token_id in index["trigrams"].get(gram, ()):
+                counts[token_id] += 1
+        for token_id, shared in counts.items():
+            if token_id in matches or shared * 3 < len(grams):
+                continue
+            candidate = vocab[token_id]
+            # Typos in a prefix: compare against the candidate cut to the query's length too
+            distance = min(_edit_distance(token, candidate, limit), _edit_distance(token, candidate[:len(token)], limit))
+            if distance <= limit:
+                matches[token_id] = FUZZY - 0.25 * distance
+    return matches
+
+
+# Names matching every word of the query (as a whole word, a prefix or with a typo), best
+# first: score is the sum over query words of match kind x field weight; ties go to shorter
+# names, then alphabetical. allowed: optional boolean mask over index["names"].
+def search(index, query, limit=20, allowed=None, fuzzy=True):
+    tokens = tokenize(query)
+    n = len(index["names"])
+    if not tokens or n == 0:
+        return []
+
+    total = np.zeros(n, dtype=np.float32)
+    matched = np.ones(n, dtype=bool) if allowed is None else np.asarray(allowed, dtype=bool).copy()
+    for token in tokens:
+        best = np.zeros(n, dtype=np.float32)
+        for token_id, kind in _matching_tokens(index, token, fuzzy).items():
+            lo, hi = index["indptr"][token_id], index["indptr"][token_id + 1]
+            products = index["postings"][lo:hi]
+            np.maximum.at(best, products, kind * index["weights"][lo:hi])
+        matched &= best > 0
+        total += best
+        if not matched.any():
+            return []
+
+    candidates = np.flatnonzero(matched)
+    order = np.lexsort((candidates, index["name_length"][candidates], -total[candidates]))
+    return [index["names"][i] for i in candidates[order[:limit]]]
+
+
+# Boolean mask over index["names"] for a set of names (e.g. the products sold at one location)
+def name_mask(index, names):
+    mask = np.zeros(len(index["names"]), dtype=bool)
+    ids = [index["name_ids"][name] for name in names if name in index["name_ids"]]
+    mask[ids] = True
+    return mask
@@ -1,122 +1,140 @@
 def run_recommendation_dashboard():
     # All your code from recommendation.py goes here
 
+    # Only what both pages need is imported here; plotly, the forecasting stack (statsmodels,
+    # sklearn) and the miner (scipy) are imported by the page or step that uses them
     import streamlit as st
     import pandas as pd
-    import plotly.graph_objects as go
-    from statsmodels.tsa.arima.model import ARIMA
-    from sklearn.metrics import mean_absolute_error, mean_squared_error
-    import numpy as np
-    from mlxtend.frequent_patterns import apriori, association_rules
-    from mlxtend.preprocessing import TransactionEncoder
-    from sklearn.model_selection import train_test_split
-    from sklearn.ensemble import RandomForestRegressor
-    from sklearn.tree import DecisionTreeRegressor
-    from sklearn.linear_model import LinearRegression
+    from artifact_store import latest_version, load_published
+    from data_store import read_table, source_path
+
+    # Frequent-itemset engine: "eclat" (sparse tid-lists), "fpgrowth" or "apriori"
+    mining_engine = "eclat"
+    # Rule Explorer rows formatted and sent to the browser per rerun
+    max_rules_shown = 500
+
+    sales_path = source_path("sales")
+    basket_path = source_path("baskets")
+    hybrid_path = source_path("hybrid")
+
+    # Artifacts published by pipeline.py are read as-is; the functions below only train
+    # (through the on-disk artifact cache) when no pipeline run has been published yet.
 
 
     # Load datasets
     @st.cache_data
     def load_sales_data():
         try:
-            data = pd.read_csv('E:/be project final/dmart_sales_with_names fi.csv')
-            data['Date'] = pd.to_datetime(data['Date'], format='%d-%m-%Y', errors='coerce')
-            data.dropna(subset=['Date'], inplace=True)
-            return data
+            return read_table("sales", columns=["Date", "Quantity"])
         except Exception as e:
             st.error(f"Error loading sales data: {e}")
             return pd.DataFrame()
 
     @st.cache_data
     def load_apriori_data():
+        from basket_loader import load_basket_matrix
         try:
-            df = pd.read_csv('E:/be project final/enhanced_apriori_dataset1.csv')
-            transactions = df.apply(lambda x: x.dropna().tolist(), axis=1).tolist()
-            te = TransactionEncoder()
-            te_ary = te.fit(transactions).transform(transactions)
-            df_encoded = pd.DataFrame(te_ary, columns=te.columns_)
-            return df_encoded, te
+            return load_basket_matrix(basket_path)
         except Exception as e:
             st.error(f"Error loading Apriori data: {e}")
-            return pd.DataFrame(), None
+            return None, []
 
     # Train ARIMA Model
     def train_arima_model():
-        data = load_sales_data()
-        if data.empty:
-            return None, None, None, None, None, None, None
-
-        monthly_sales = data.resample('M', on='Date')['Quantity'].sum().reset_index()
-
-        # Define ARIMA order manually
-        arima_order = (1, 1, 1)  # (p, d, q) - Can be tuned
-        model = ARIMA(monthly_sales['Quantity'], order=arima_order)
-        model_fit = model.fit()
-        
-        predictions = model_fit.predict(start=1, end=len(monthly_sales) - 1)
-        forecast = model_fit.forecast(steps=2)
-
-        mae = mean_absolute_error(monthly_sales['Quantity'][1:], predictions)
-        rmse = np.sqrt(mean_squared_error(monthly_sales['Quantity'][1:], predictions))
-        mape = np.mean(np.abs((monthly_sales['Quantity'][1:] - predictions) / monthly_sales['Quantity'][1:])) * 100
-        accuracy = 100 - mape
-        
-        return monthly_sales, predictions, forecast, mae, rmse, mape, accuracy
+        from artifact_cache import cached_artifact
+        from forecasting import ARIMA_ORDER, FORECAST_STEPS, fit_arima
+        arima = load_published("arima")
+        if arima is None:
+            data = load_sales_data()
+            if data.empty:
+                return None, None, None, None, None, None, None
+            params = {"order": ARIMA_ORDER, "steps": FORECAST_STEPS}
+            arima = cached_artifact("arima", [sales_path], params, lambda: fit_arima(data, ARIMA_ORDER, FORECAST_STEPS))
+        return arima["result"]
 
     # Hybrid Model Sales Forecasting
     def train_hybrid_model():
+        from artifact_cache import cached_artifact
+        from forecasting import HYBRID_PARAMS, fit_hybrid
         try:
-            df = pd.read_csv("E:/be project final/processed_dmart_sales1.csv")
-            X = df.drop(columns=["SalesAmount", "Name"], errors='ignore')
-            y = df["SalesAmount"]
-
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-            rf = RandomForestRegressor(n_estimators=100, random_state=42)
-            dt = DecisionTreeRegressor(random_state=42)
-            lr = LinearRegression()
-
-            rf.fit(X_train, y_train)
-            dt.fit(X_train, y_train)
-            lr.fit(X_train, y_train)
-
-            rf_pred = rf.predict(X_test)
-            dt_pred = dt.predict(X_test)
-            lr_pred = lr.predict(X_test)
-
-            hybrid_pred = (rf_pred + dt_pred + lr_pred) / 3
-            mae = mean_absolute_error(y_test, hybrid_pred)
-
-            df["PredictedSalesAmount"] = (rf.predict(X) + dt.predict(X) + lr.predict(X)) / 3
-            product_sales = df.groupby("Name").agg(
-                ActualSalesAmount=("SalesAmount", "sum"),
-                PredictedSalesAmount=("PredictedSalesAmount", "sum")
-            ).reset_index()
-            return product_sales, mae
+            hybrid = load_published("hybrid")
+            if hybrid is None:
+                hybrid = cached_artifact(
+                    "hybrid", [hybrid_path], HYBRID_PARAMS,
+                    lambda: fit_hybrid(read_table("hybrid"), **HYBRID_PARAMS),
+                )
+            return hybrid["product_sales"], hybrid["mae"]
         except Exception as e:
             st.error(f"Error in hybrid model training: {e}")
             return pd.DataFrame(), None
 
     # Apply Apriori Algorithm
     def apply_apriori_algorithm():
-        df_encoded, te = load_apriori_data()
-        if df_encoded.empty:
+        from artifact_cache import cached_artifact
+        from miner import mine_rules
+        basket_matrix, items = load_apriori_data()
+        if basket_matrix is None or basket_matrix.shape[0] == 0:
             return pd.DataFrame()
 
-        frequent_itemsets = apriori(df_encoded, min_support=0.01, use_colnames=True)
+        params = {"min_support": 0.01, "engine": mining_engine, "metric": "lift", "min_threshold": 1.0}
+        return cached_artifact("rules", [basket_path], params, lambda: mine_rules(basket_matrix, items, 0.01, mining_engine))
+
+    # Build the rule index once; reruns reuse it instead of scanning the rules table.
+    # Keyed on the published version so a new pipeline run is picked up without a restart.
+    @st.cache_resource
+    def load_rule_index(version):
+        from rule_index import build_rule_index
+        published = load_published("rule_index", version)
+        if published is not None:
+            return published
+        return build_rule_index(apply_apriori_algorithm())
 
-        rules = association_rules(frequent_itemsets, metric="lift", min_threshold=1.0) if not frequent_itemsets.empty else pd.DataFrame()
-        return rules
+    # Item-item neighbours for every product in the baskets, including those no rule covers
+    @st.cache_resource
+    def load_similarity_index(version):
+        from artifact_cache import cached_artifact
+        from item_similarity import build_similarity_index
+        published = load_published("item_similarity", version)
+        if published is not None:
+            return published
+        basket_matrix, items = load_apriori_data()
+        if basket_matrix is None:
+            return None
+        return cached_artifact("item_similarity", [basket_path], {"k": 20, "measure": "cosine"},
+                               lambda: build_similarity_index(basket_matrix, items, k=20, measure="cosine"))
 
-    # Get top recommendations
-    def get_top_recommendations(product, rules_df, top_n=5):
-        recommendations = rules_df[rules_df['antecedents'].apply(lambda x: product in x)]
-        recommendations = recommendations.sort_values(by="lift", ascending=False).head(top_n)
-        recommendations = recommendations[['consequents']].explode('consequents')
-        return recommendations['consequents'].value_counts().head(top_n).index.tolist()
+    # One progressive miner per data version, shared by every session: a sample is mined at
+    # once and refined in the background until the whole basket history has been mined
+    @st.cache_resource
+    def load_progressive_miner(version):
+        from approx_miner import ProgressiveMiner
+        basket_matrix, items = load_apriori_data()
+        if basket_matrix is None or basket_matrix.shape[0] == 0:
+            return None
+        # Same support floor as the recommendation page; rules below lift 1 are never mined
+        return ProgressiveMiner(basket_matrix, items, min_support=0.01, min_lift=1.0).start()
+
+    # Product search over the catalog and every basket item
+    @st.cache_resource
+    def load_search_index(version):
+        from product_search import build_search_index
+        published = load_published("product_search", version)
+        if published is not None:
+            return published
+        from product_dim import build_product_dimension
+        similarity = load_similarity_index(version)
+        return build_search_index(build_product_dimension(read_table("catalog")),
+                                  similarity["items"] if similarity is not None else ())
+
+    # Get top recommendations: rules first, then similar items
+    def get_top_recommendations(product, rule_index, top_n=5):
+        from rule_index import lookup_with_fallback
+        return lookup_with_fallback(rule_index, load_similarity_index(latest_version()), product, top_n)
 
     # Sales Forecasting UI
     def sales_forecasting():
+        import plotly.graph_objects as go
+        from multi_forecast import forecast_frame
         st.markdown("## 🔮 Sales Forecasting")
         
         monthly_sales, predictions, forecast, mae, rmse, mape, accuracy = train_arima_model()
@@ -129,7 +147,7 @@ def run_recommendation_dashboard():
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=monthly_sales['Date'], y=monthly_sales['Quantity'], mode='lines+markers', name='Actual Sales'))
         fig.add_trace(go.Scatter(x=monthly_sales['Date'][1:], y=predictions, mode='lines', name='Predicted Sales (ARIMA)', line=dict(dash='dash')))
-        fig.add_trace(go.Scatter(x=pd.date_range(start=monthly_sales['Date'].iloc[-1] + pd.DateOffset(1), periods=2, freq='M'), 
+        fig.add_trace(go.Scatter(x=pd.date_range(start=monthly_sales['Date'].iloc[-1] + pd.DateOffset(1), periods=2, freq='ME'), 
                                 y=forecast, mode='lines+markers', name='Forecasted Sales', line=dict(color='red', dash='dot')))
 
         fig.update_layout(title='Monthly Sales Forecast', xaxis_title='Date', yaxis_title='Sales Quantity', template='plotly_white')
@@ -142,40 +160,136 @@ def run_recommendation_dashboard():
         st.write(f"🏆 ARIMA Accuracy: {accuracy:.2f}%")
         st.write(f"🤖 Hybrid Model MAE: {hybrid_mae:.2f}")
 
+        # Rolling-origin folds only train on data before each cutoff, unlike the in-sample numbers above
+        backtest = load_published("backtest")
+        if backtest is not None:
+            st.subheader("🧪 Backtest (rolling origin)")
+            st.write("ARIMA, by months ahead:")
+            st.dataframe(backtest["arima_summary"])
+            # Hybrid folds are only meaningful when the rows were put in time order
+            hybrid_folds, time_column = backtest["hybrid"], backtest.get("hybrid_time_column")
+            if hybrid_folds is not None and time_column is not None and not hybrid_folds.empty:
+                order = time_column if isinstance(time_column, str) else " / ".join(time_column)
+                st.write(f"Hybrid Model MAE over {len(hybrid_folds)} later windows (rows ordered by {order}): "
+                         f"{hybrid_folds['mae'].mean():.2f}")
+                st.dataframe(hybrid_folds)
+            else:
+                st.caption("No hybrid backtest: the hybrid data has no Year and Month columns to order its rows by.")
+
         st.subheader("📊 Product-wise Sales Predictions (Hybrid Model)")
         if not product_sales.empty:
             selected_product = st.selectbox("Select a product to view predictions:", product_sales["Name"].unique())
             product_data = product_sales[product_sales["Name"] == selected_product]
             st.dataframe(product_data)
 
+        # Per product and location forecasts are only fitted offline by pipeline.py
+        sku_forecasts = load_published("sku_forecasts")
+        if sku_forecasts is not None and sku_forecasts["series"]:
+            st.subheader("📦 Product & Location Forecasts")
+            sku_frame = forecast_frame(sku_forecasts).reset_index()
+            sku_frame.columns = [c.strftime('%b %Y') if isinstance(c, pd.Timestamp) else c for c in sku_frame.columns]
+            sku_product = st.selectbox("Select a product to view its forecast by location:", sku_frame["Name"].unique())
+            st.dataframe(sku_frame[sku_frame["Name"] == sku_product])
+
     # Product Recommendation Section
     def product_recommendation():
+        from rule_index import basket_recommendations, indexed_products
+        from product_search import name_mask, search
         st.markdown("## 🛍 Product Recommendation (Apriori)")
         
-        rules = apply_apriori_algorithm()
-        
-        if not rules.empty:
-            all_products = sorted(set(item for sublist in rules['antecedents'].apply(list) for item in sublist))
-            selected_product = st.selectbox("Select a product to get recommendations:", all_products)
+        rule_index = load_rule_index(latest_version())
+        similarity = load_similarity_index(latest_version())
+
+        if not rule_index["rules"].empty or similarity is not None:
+            all_products = similarity["items"] if similarity is not None else indexed_products(rule_index)
+            search_index = load_search_index(latest_version())
+            in_baskets = name_mask(search_index, all_products)
+            if similarity is not None:
+                # Most frequently bought first when nothing has been typed
+                popular = [all_products[i] for i in similarity["counts"].argsort(kind="mergesort")[::-1][:20]]
+            else:
+                popular = all_products[:20]
+
+            query = st.text_input("Search products:", key="recommendation_query")
+            options = search(search_index, query, 20, allowed=in_baskets) if query else popular
+            selected_product = st.selectbox("Select a product to get recommendations:", options)
             
             if selected_product:
-                top_product_recommendations = get_top_recommendations(selected_product, rules)
+                top_product_recommendations = get_top_recommendations(selected_product, rule_index)
                 st.write(f"Top 5 Product Recommendations for {selected_product}:")
                 st.write(top_product_recommendations)
+
+            # Whole-cart recommendations also use rules with multi-item antecedents
+            # Items already in the basket stay in the options as the search changes
+            basket_query = st.text_input("Search items to add to the basket:", key="basket_query")
+            chosen = st.session_state.get("basket", [])
+            matches = search(search_index, basket_query, 20, allowed=in_baskets) if basket_query else popular
+            basket = st.multiselect("Or build a basket to get recommendations for the whole cart:",
+                                    chosen + [item for item in matches if item not in chosen], key="basket")
+            if basket:
+                st.write("Top 5 Recommendations for this basket:")
+                st.write(basket_recommendations(rule_index, basket))
         else:
             st.write("No association rules found.")
 
+    # Threshold tuning on the latest (approximate or exact) mining result; sliders only filter it
+    def rule_explorer():
+        from approx_miner import filter_rules
+        st.markdown("## 🎛 Rule Explorer")
+
+        miner = load_progressive_miner(latest_version())
+        if miner is None:
+            st.error("Basket data not available!")
+            return
+        result = miner.result()
+        if result is None:
+            if miner.error is not None:
+                st.error(f"Rule mining failed: {miner.error}")
+            else:
+                st.info("Mining a first sample of the baskets…")
+                st.button("Refresh")
+            return
+
+        min_support = st.slider("Minimum support", float(result["min_support"]), 0.2, 0.01, step=0.001, format="%.3f")
+        min_confidence = st.slider("Minimum confidence", 0.0, 1.0, 0.0, step=0.05)
+        min_lift = st.slider("Minimum lift", float(result["min_lift"]), 10.0, float(result["min_lift"]), step=0.1)
+
+        if result["exact"]:
+            st.success(f"Exact results over all {result['baskets']:,} baskets.")
+        else:
+            st.info(f"Approximate: mined {result['sample_size']:,} of {result['baskets']:,} baskets "
+                    f"(stage {miner.stage} of {len(miner.schedule)}), refining in the background. "
+                    "Low/high columns are 95% bounds.")
+            st.button("Refresh")
+        if miner.error is not None:
+            st.warning(f"Refinement stopped: {miner.error}")
+
+        rules = filter_rules(result, min_support, min_confidence, min_lift)
+        st.write(f"{len(rules):,} rules, {int(rules['certain'].sum()):,} of them clear the thresholds on their lower bounds.")
+        # Only the strongest rules are formatted and sent to the browser; filter_rules sorts by lift
+        shown = rules.head(max_rules_shown)
+        if len(rules) > len(shown):
+            st.caption(f"Showing the {len(shown):,} with the highest lift.")
+        display = shown.assign(
+            antecedents=shown["antecedents"].apply(lambda items: ", ".join(sorted(items))),
+            consequents=shown["consequents"].apply(lambda items: ", ".join(sorted(items))),
+        )
+        st.dataframe(display[["antecedents", "consequents", "support", "support_low", "support_high", "confidence",
+                              "confidence_low", "confidence_high", "lift", "lift_low", "lift_high", "certain"]])
+
     # # Main App
     # st.set_page_config(page_title="D-Mart Sales Dashboard", layout="wide", page_icon="📊")
 
     with st.sidebar:
         st.title("📊 D-Mart Analytics")
-        page = st.radio("Navigation", ["📈 Sales Forecasting", "🤝 Product Recommendation"], index=0)
+        page = st.radio("Navigation", ["📈 Sales Forecasting", "🤝 Product Recommendation", "🎛 Rule Explorer"], index=0)
 
     if page == "📈 Sales Forecasting":
         sales_forecasting()
     elif page == "🤝 Product Recommendation":
         product_recommendation()
+    elif page == "🎛 Rule Explorer":
+        rule_explorer()
 
 
 
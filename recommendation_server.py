@@ -0,0 +1,275 @@
+"""Standalone HTTP endpoint for product recommendations.
+
+    python recommendation_server.py --port 8765
+
+Loads the rule index published by pipeline.py (or a pickled index given with --index)
+once at start-up and answers from memory:
+
+    GET  /recommend?product=<name>&top_n=5       single product
+    POST /recommend/basket  {"items": [...], "top_n": 5}
+    POST /recommend/batch   {"requests": [{"product": ...} | {"items": [...]}, ...]}
+    GET  /metrics                                latency percentiles and cache counters
+    GET  /health
+"""
+import argparse
+import json
+import pickle
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from artifact_store import ARTIFACT_ROOT, latest_version, load_published
+from rule_index import basket_recommendations, lookup_with_fallback
+
+
+# A request the client got wrong; answered with 400 and the message
+class BadRequest(ValueError):
+    pass
+
+
+# Largest top_n served; also bounds how many cache entries one product or cart can take
+MAX_TOP_N = 100
+
+
+# top_n as an int between 1 and MAX_TOP_N
+def _top_n(value):
+    try:
+        return min(max(int(value), 1), MAX_TOP_N)
+    except (TypeError, ValueError, OverflowError):  # OverflowError: JSON 1e999 / Infinity
+        raise BadRequest("'top_n' must be an integer") from None
+
+
+def _items(value):
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise BadRequest("'items' must be a list of product names")
+    return value
+
+
+# ("basket", items, top_n) or ("product", product, top_n) for one batch entry
+def _parse_request(request):
+    if not isinstance(request, dict):
+        raise BadRequest("each batch request must be an object")
+    top_n = _top_n(request.get("top_n", 5))
+    if "items" in request:
+        return "basket", _items(request["items"]), top_n
+    if not isinstance(request.get("product"), str):
+        raise BadRequest("each batch request needs a 'product' name or an 'items' list")
+    return "product", request["product"], top_n
+
+
+# Thread-safe LRU of response payloads with hit/miss counters
+class ResponseCache:
+    def __init__(self, max_entries=10_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+# Rolling window of request latencies per endpoint
+class LatencyRecorder:
+    def __init__(self, window=10_000):
+        self.window = window
+        self.samples = {}
+        self.counts = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self.lock:
+            self.samples.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self.counts[endpoint] += 1
+
+    def summary(self):
+        with self.lock:
+            snapshot = {endpoint: np.array(samples) for endpoint, samples in self.samples.items()}
+            counts = dict(self.counts)
+        report = {}
+        for endpoint, samples in snapshot.items():
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+            report[endpoint] = {
+                "count": counts[endpoint],
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(samples.max()) * 1000, 3),
+            }
+        return report
+
+
+# Recommendations answered from an in-memory rule index; products without rules fall back
+# to the item similarity index when one is given
+class RecommendationService:
+    def __init__(self, index, cache_size=10_000, similarity=None):
+        self.index = index
+        self.similarity = similarity
+        self.cache = ResponseCache(cache_size)
+        self.latency = LatencyRecorder()
+
+    def recommend(self, product, top_n=5):
+        return self.cache.get_or_compute(
+            ("product", product, top_n), lambda: lookup_with_fallback(self.index, self.similarity, product, top_n)
+        )
+
+    # Every rule whose antecedent lies inside the cart, ranked by lift; cart items are left out
+    def recommend_basket(self, items, top_n=5):
+        cart = tuple(sorted(set(items)))
+        return self.cache.get_or_compute(
+            ("basket", cart, top_n), lambda: basket_recommendations(self.index, cart, top_n)
+        )
+
+    # Several requests in one round trip; every entry is checked before any is answered,
+    # so a malformed one raises BadRequest without doing the others' work
+    def batch(self, requests):
+        parsed = [_parse_request(request) for request in requests]
+        return [self.recommend_basket(value, top_n) if kind == "basket" else self.recommend(value, top_n)
+                for kind, value, top_n in parsed]
+
+    def metrics(self):
+        return {
+            "latency": self.latency.summary(),
+            "cache": self.cache.stats(),
+            "products": len(self.index["by_product"]),
+            "rules": len(self.index["rules"]),
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/recommend":
+            query = parse_qs(url.query)
+            product = query.get("product", [None])[0]
+            if product is None:
+                return self._send(400, {"error": "missing 'product'"})
+            try:
+                top_n = _top_n(query.get("top_n", ["5"])[0])
+            except BadRequest as e:
+                return self._send(400, {"error": str(e)})
+            return self._timed("recommend", lambda: {
+                "product": product, "recommendations": self.service.recommend(product, top_n),
+            })
+        if url.path == "/metrics":
+            return self._send(200, self.service.metrics())
+        if url.path == "/health":
+            return self._send(200, {"status": "ok"})
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "invalid JSON body"})
+        if not isinstance(body, dict):
+            return self._send(400, {"error": "JSON body must be an object"})
+        if url.path == "/recommend/basket":
+            try:
+                items, top_n = _items(body.get("items")), _top_n(body.get("top_n", 5))
+            except BadRequest as e:
+                return self._send(400, {"error": str(e)})
+            return self._timed("basket", lambda: {
+                "items": items, "recommendations": self.service.recommend_basket(items, top_n),
+            })
+        if url.path == "/recommend/batch":
+            requests = body.get("requests")
+            if not isinstance(requests, list):
+                return self._send(400, {"error": "'requests' must be a list"})
+            return self._timed("batch", lambda: {"results": self.service.batch(requests)})
+        self._send(404, {"error": "not found"})
+
+    def _timed(self, endpoint, handle):
+        start = time.perf_counter()
+        try:
+            payload = handle()
+        except BadRequest as e:
+            return self._send(400, {"error": str(e)})
+        self.service.latency.record(endpoint, time.perf_counter() - start)
+        self._send(200, payload)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# HTTP server bound to host:port (port 0 picks a free one); call serve_forever() or use start_server
+def make_server(service, host="127.0.0.1", port=8765):
+    handler = type("RecommendationHandler", (_Handler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+# Serve on a daemon thread, e.g. for tests against a local server; returns the server
+def start_server(service, host="127.0.0.1", port=0):
+    server = make_server(service, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def load_index(path=None, root=ARTIFACT_ROOT):
+    if path is not None:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    index = load_published("rule_index", root=root)
+    if index is None:
+        raise FileNotFoundError(f"no published rule index under {root}; run pipeline.py first")
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve product recommendations over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--index", default=None, help="pickled rule index (default: latest pipeline.py run)")
+    parser.add_argument("--artifacts", default=ARTIFACT_ROOT, help="artifact root published by pipeline.py")
+    parser.add_argument("--cache-size", type=int, default=10_000)
+    args = parser.parse_args(argv)
+
+    similarity = None if args.index else load_published("item_similarity", root=args.artifacts)
+    service = RecommendationService(load_index(args.index, args.artifacts), args.cache_size, similarity)
+    server = make_server(service, args.host, args.port)
+    version = "file " + args.index if args.index else "version " + str(latest_version(args.artifacts))
+    print(f"serving {version} on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
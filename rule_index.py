@@ -0,0 +1,89 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from basket_scorer import build_antecedent_trie, score_basket
+from item_similarity import similar_items
+
+
+# Build a product -> rules lookup once, so recommendations don't scan the whole rules table
+def build_rule_index(rules_df, top_n=5):
+    if rules_df is None or rules_df.empty:
+        return {"rules": pd.DataFrame(), "consequents": [], "by_product": {}, "top": {}, "top_n": top_n,
+                "trie": build_antecedent_trie(None)}
+
+    # Sort once by lift; every per-product slice below keeps this order
+    rules = rules_df.sort_values(by="lift", ascending=False, kind="mergesort").reset_index(drop=True)
+
+    # One row per (antecedent item, rule position)
+    exploded = rules["antecedents"].apply(list).explode()
+    positions = pd.Series(exploded.index.to_numpy(dtype=np.int64))
+    by_product = {
+        product: group.to_numpy()
+        for product, group in positions.groupby(exploded.to_numpy(), sort=True)
+    }
+
+    consequents = rules["consequents"].tolist()
+    top = {product: _top_consequents(rows, consequents, top_n) for product, rows in by_product.items()}
+    return {"rules": rules, "consequents": consequents, "by_product": by_product, "top": top, "top_n": top_n,
+            "trie": build_antecedent_trie(rules)}
+
+
+# Count consequents of the strongest rules, same as the old explode + value_counts
+def _top_consequents(rows, consequents, top_n):
+    counts = Counter()
+    for row in rows[:top_n]:
+        counts.update(consequents[row])
+    return [item for item, _ in counts.most_common(top_n)]
+
+
+# Products that appear as an antecedent, sorted for the selectbox
+def indexed_products(index):
+    return list(index["by_product"].keys())
+
+
+# Rules for one product, strongest lift first
+def product_rules(index, product):
+    rows = index["by_product"].get(product)
+    if rows is None:
+        return index["rules"].iloc[0:0]
+    return index["rules"].iloc[rows]
+
+
+# Top recommendations for a single product
+def lookup_recommendations(index, product, top_n=5):
+    rows = index["by_product"].get(product)
+    if rows is None:
+        return []
+    if top_n == index["top_n"]:
+        return list(index["top"][product])
+    return _top_consequents(rows, index["consequents"], top_n)
+
+
+# Rule-based recommendations topped up from the item-item similarity index, so products
+# below the mining support threshold still get recommendations
+def lookup_with_fallback(index, similarity, product, top_n=5):
+    recommendations = lookup_recommendations(index, product, top_n)
+    if len(recommendations) < top_n and similarity is not None:
+        seen = set(recommendations) | {product}
+        for item in similar_items(similarity, product, top_n + len(seen)):
+            if item not in seen:
+                recommendations.append(item)
+                seen.add(item)
+                if len(recommendations) == top_n:
+                    break
+    return recommendations
+
+
+# Recommendations for many products (e.g. a whole basket) in one call
+def batch_recommendations(index, products, top_n=5):
+    return {product: lookup_recommendations(index, product, top_n) for product in products}
+
+
+# Recommendations for a whole cart from every rule whose antecedent is inside it (multi-item
+# antecedents included), ranked by lift; items already in the cart are skipped
+def basket_recommendations(index, cart, top_n=5, metric="lift", aggregate="max"):
+    if "trie" not in index:
+        index["trie"] = build_antecedent_trie(index["rules"])
+    return score_basket(index["trie"], cart, top_n, metric, aggregate)["item"].tolist()
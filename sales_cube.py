@@ -0,0 +1,79 @@
+import numpy as np
+
+from instrumentation import stage
+from product_dim import attach_attributes
+
+
+DIMENSIONS = ["Location", "Date", "Month", "Category", "SubCategory", "Brand", "Name"]
+# UnitPriceSum / Rows rolls up to the row-weighted mean unit price at any grain
+MEASURES = ["Quantity", "Revenue", "UnitPriceSum", "Rows"]
+
+
+# Aggregate sales to one row per (Location, Date, Category, SubCategory, Brand, Name), sorted by
+# Location so a location's rows are one contiguous slice.
+# Catalog attributes come from the product dimension (one row per name), so they are an
+# integer gather per sales row and names listed at several pack sizes don't multiply rows.
+def build_sales_cube(sales, products):
+    df = sales[['Location', 'Date', 'Name', 'Quantity', 'UnitPrice']]
+    with stage("catalog_merge", rows=len(df)):
+        df = attach_attributes(df, products, ['Category', 'SubCategory', 'Brand'])
+    df['Revenue'] = df['Quantity'] * df['UnitPrice']
+    df['Month'] = df['Date'].dt.to_period('M').dt.to_timestamp()
+
+    with stage("sales_cube.groupby", rows=len(df)):
+        cube = df.groupby(DIMENSIONS, observed=True, dropna=False, sort=True).agg(
+            Quantity=('Quantity', 'sum'),
+            Revenue=('Revenue', 'sum'),
+            UnitPriceSum=('UnitPrice', 'sum'),
+            Rows=('UnitPrice', 'size'),
+        ).reset_index()
+    for column in ['Location', 'Category', 'SubCategory', 'Brand', 'Name']:
+        cube[column] = cube[column].astype('category')
+
+    codes = cube['Location'].cat.codes.to_numpy()
+    bounds = np.flatnonzero(np.diff(codes)) + 1
+    starts = np.concatenate([[0], bounds]) if len(cube) else np.empty(0, dtype=np.int64)
+    stops = np.concatenate([bounds, [len(cube)]]) if len(cube) else np.empty(0, dtype=np.int64)
+    slices = {cube['Location'].iat[start]: (start, stop) for start, stop in zip(starts, stops)}
+
+    location_totals = cube.groupby('Location', observed=True)[MEASURES].sum()
+    return {"cube": cube, "slices": slices, "location_totals": location_totals}
+
+
+def cube_locations(cube):
+    return list(cube["slices"].keys())
+
+
+# Rows of the cube for one location (or all of it), further narrowed by {dimension: value}
+def slice_cube(cube, location=None, where=None):
+    rows = cube["cube"]
+    if location is not None:
+        start, stop = cube["slices"].get(location, (0, 0))
+        rows = rows.iloc[start:stop]
+    for column, value in (where or {}).items():
+        rows = rows[rows[column] == value]
+    return rows
+
+
+# Roll the cube up to `by` for one location slice. measures may include "UnitPrice" (mean).
+def rollup(cube, by, measures=("Quantity", "Revenue"), location=None, where=None):
+    by = [by] if isinstance(by, str) else list(by)
+    rows = slice_cube(cube, location, where)
+    if by == ["Location"] and location is None and not where:
+        grouped = cube["location_totals"].copy()
+    else:
+        grouped = rows.groupby(by, observed=True)[MEASURES].sum()
+    grouped["UnitPrice"] = grouped["UnitPriceSum"] / grouped["Rows"]
+    return grouped[list(measures)].reset_index()
+
+
+# Largest `n` members of one dimension by a measure, like groupby().sum().nlargest()
+def top_members(cube, dimension, measure, n=10, location=None, where=None):
+    totals = rollup(cube, dimension, (measure,), location, where)
+    return totals.sort_values(measure, ascending=False, kind="mergesort").head(n).reset_index(drop=True)
+
+
+# Distinct members of one dimension in a slice, sorted
+def members(cube, dimension, location=None, where=None):
+    values = slice_cube(cube, location, where)[dimension].dropna().unique()
+    return np.sort(np.asarray(values, dtype=object))
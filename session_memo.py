@@ -0,0 +1,98 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+SESSION_KEY = "_session_memo"
+MAX_MEMO_BYTES = 64 * 1024 ** 2
+
+
+# Approximate in-memory size of a memoized value
+def value_bytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(value_bytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+# Derived results of one session, keyed on (name, inputs...) for one data version.
+# A result is recomputed only when one of the inputs in its key changes; the least recently
+# used results are dropped once the total goes over max_bytes. A new data version (or an
+# explicit invalidate()) clears everything.
+class SessionMemo:
+    def __init__(self, version=None, max_bytes=MAX_MEMO_BYTES):
+        self.version = version
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+        value = compute()
+        size = value_bytes(value)
+        with self.lock:
+            if size <= self.max_bytes:
+                self._drop(key)
+                self.entries[key] = value
+                self.sizes[key] = size
+                self.total_bytes += size
+                while self.total_bytes > self.max_bytes:
+                    self._drop(next(iter(self.entries)))
+        return value
+
+    # Drop every entry, or only those whose name (first key element) is in names
+    def invalidate(self, names=None, version=None):
+        with self.lock:
+            if names is None:
+                self.entries.clear()
+                self.sizes.clear()
+                self.total_bytes = 0
+            else:
+                for key in [key for key in self.entries if key[0] in set(names)]:
+                    self._drop(key)
+            if version is not None:
+                self.version = version
+
+    def _drop(self, key):
+        if key in self.entries:
+            del self.entries[key]
+            self.total_bytes -= self.sizes.pop(key)
+
+    def stats(self):
+        with self.lock:
+            return {"version": self.version, "entries": len(self.entries), "bytes": self.total_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+# This session's memo (st.session_state or any dict-like), emptied when the data version changes
+def session_memo(state, version, max_bytes=MAX_MEMO_BYTES):
+    memo = state.get(SESSION_KEY)
+    if memo is None:
+        memo = state[SESSION_KEY] = SessionMemo(version, max_bytes)
+    elif memo.version != version:
+        memo.invalidate(version=version)
+    return memo
+
+
+# Call when the source data changes outside a pipeline.py publish (e.g. after editing the CSVs)
+def invalidate_session_memo(state):
+    memo = state.get(SESSION_KEY)
+    if memo is not None:
+        memo.invalidate()
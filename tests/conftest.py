@@ -0,0 +1,33 @@
+import os
+import random
+import sys
+
+import pytest
+
+# The modules live at the repository root rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Random baskets over a small catalog, skewed so some items and pairs are frequent
+def random_baskets(n, n_items=12, seed=0):
+    rng = random.Random(seed)
+    catalog = [f"item{i:02d}" for i in range(n_items)]
+    weights = [1 / (i + 1) for i in range(n_items)]
+    return [set(rng.choices(catalog, weights, k=rng.randint(1, 5))) for _ in range(n)]
+
+
+@pytest.fixture
+def baskets():
+    return random_baskets(300)
+
+
+# Every database call goes to a fresh file in tmp_path through a fresh pool
+@pytest.fixture
+def users_db(tmp_path, monkeypatch):
+    import database
+
+    database.close_connection()
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "users.db"))
+    database.init_db()
+    yield database
+    database.close_connection()
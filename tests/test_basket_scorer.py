@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from basket_scorer import build_antecedent_trie, matching_rules, score_basket
+from conftest import random_baskets
+from miner import encode_transactions, mine_rules
+from rule_index import basket_recommendations, build_rule_index
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return mine_rules(*encode_transactions(random_baskets(400, seed=7)), min_support=0.01)
+
+
+def carts(rules, n=50, seed=0):
+    rng = random.Random(seed)
+    items = sorted(set().union(*rules["antecedents"]))
+    return [set(rng.sample(items, rng.randint(1, 5))) for _ in range(n)] + [set(), {"not sold here"}]
+
+
+def test_matching_rules_equals_subset_scan(rules):
+    trie = build_antecedent_trie(rules)
+    for cart in carts(rules):
+        expected = [row for row, antecedent in enumerate(rules["antecedents"]) if antecedent <= cart]
+        assert sorted(matching_rules(trie, cart)) == expected
+
+
+@pytest.mark.parametrize("metric", ["lift", "confidence"])
+@pytest.mark.parametrize("aggregate", ["max", "sum"])
+def test_score_basket_equals_naive_scores(rules, metric, aggregate):
+    trie = build_antecedent_trie(rules)
+    for cart in carts(rules):
+        scores, counts = {}, {}
+        for row in rules[[antecedent <= cart for antecedent in rules["antecedents"]]].itertuples(index=False):
+            for item in row.consequents - cart:
+                value = getattr(row, metric)
+                scores[item] = max(scores.get(item, 0), value) if aggregate == "max" else scores.get(item, 0) + value
+                counts[item] = counts.get(item, 0) + 1
+        expected = sorted(scores, key=lambda item: (-scores[item], -counts[item], item))[:5]
+
+        result = score_basket(trie, cart, 5, metric, aggregate)
+        assert result["item"].tolist() == expected
+        assert result["score"].tolist() == pytest.approx([scores[item] for item in expected])
+        assert result["rules"].tolist() == [counts[item] for item in expected]
+
+
+def test_score_basket_rejects_unknown_options(rules):
+    trie = build_antecedent_trie(rules)
+    with pytest.raises(ValueError):
+        score_basket(trie, {"item00"}, metric="support")
+    with pytest.raises(ValueError):
+        score_basket(trie, {"item00"}, aggregate="mean")
+
+
+def test_empty_rules_recommend_nothing():
+    index = build_rule_index(None)
+    assert basket_recommendations(index, ["item00", "item01"]) == []
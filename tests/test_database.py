@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+import passwords
+from auth import AuthService
+from passwords import hash_password, legacy_hash, verify_password
+
+
+@pytest.fixture(autouse=True)
+def cheap_hashes(monkeypatch):
+    monkeypatch.setattr(passwords, "ITERATIONS", 1000)
+
+
+def stored_password(db, username):
+    with db.connection() as conn:
+        return conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()[0]
+
+
+def test_verify_password_flags_rehash():
+    assert verify_password("secret", hash_password("secret")) == (True, False)
+    assert verify_password("wrong", hash_password("secret")) == (False, False)
+    assert verify_password("secret", hash_password("secret", iterations=500)) == (True, True)
+    assert verify_password("secret", legacy_hash("secret")) == (True, True)
+    assert verify_password("wrong", legacy_hash("secret")) == (False, True)
+    assert verify_password("secret", None) == (False, False)
+
+
+def test_hashes_are_salted():
+    assert hash_password("secret") != hash_password("secret")
+
+
+def test_legacy_hash_is_upgraded_on_login(users_db):
+    with users_db.connection() as conn, conn:
+        conn.execute("INSERT INTO users VALUES (?, ?, ?)", ("old", "old@example.com", legacy_hash("secret")))
+
+    assert users_db.validate_login("old", "wrong") is None
+    assert stored_password(users_db, "old") == legacy_hash("secret")
+
+    assert users_db.validate_login("old@example.com", "secret")[0] == "old"
+    upgraded = stored_password(users_db, "old")
+    assert upgraded.startswith("pbkdf2_sha256$1000$")
+    assert users_db.validate_login("old", "secret")[0] == "old"
+    assert stored_password(users_db, "old") == upgraded
+
+
+def test_outdated_work_factor_is_upgraded(users_db, monkeypatch):
+    assert users_db.save_user_to_db("alice", "alice@example.com", "secret")
+    monkeypatch.setattr(passwords, "ITERATIONS", 2000)
+    assert users_db.validate_login("alice", "secret")
+    assert stored_password(users_db, "alice").startswith("pbkdf2_sha256$2000$")
+
+
+def test_signup_login_and_reset(users_db):
+    service = AuthService(workers=2)
+    try:
+        assert service.signup("bob", "bob@example.com", "secret")
+        assert not service.signup("bob", "other@example.com", "secret")
+        assert users_db.is_user_exists(email="bob@example.com")
+        service.reset_password("bob@example.com", "changed", by_email=True)
+        assert users_db.validate_login("bob", "secret") is None
+        assert users_db.validate_login("bob", "changed")
+    finally:
+        service.shutdown()
+
+
+def test_import_users_skips_taken_accounts(users_db):
+    users_db.save_user_to_db("carol", "carol@example.com", "secret")
+    added = users_db.import_users([("carol", "c2@example.com", "x"), ("dave", "carol@example.com", "x"),
+                                   ("erin", "erin@example.com", "x")])
+    assert added == 1
+    assert users_db.validate_login("erin", "x")
+
+
+def test_pool_under_40_threads(users_db):
+    users_db.import_users([(f"user{i}", f"user{i}@example.com", "pw") for i in range(40)])
+    errors = []
+    barrier = threading.Barrier(40)
+
+    def worker(i):
+        try:
+            barrier.wait()
+            for j in range(50):
+                assert users_db.is_user_exists(username=f"user{(i + j) % 40}")
+                assert not users_db.is_user_exists(email=f"nobody{i}@example.com")
+            with users_db.connection() as conn, conn:
+                conn.execute("UPDATE users SET email = ? WHERE username = ?", (f"new{i}@example.com", f"user{i}"))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(40)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(users_db._opened) <= users_db.POOL_SIZE
+    assert users_db._pool.qsize() == len(users_db._opened)
+    assert all(users_db.is_user_exists(email=f"new{i}@example.com") for i in range(40))
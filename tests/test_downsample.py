@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsample import lttb, min_max
+
+
+# Straightforward LTTB (Steinarsson 2013), one bucket at a time, bucket edges in exact integer arithmetic
+def reference_lttb(x, y, threshold):
+    n = len(x)
+    def edge(i):
+        return i * (n - 2) // (threshold - 2) + 1
+
+    keep = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edge(i), edge(i + 1)
+        next_start, next_stop = stop, min(edge(i + 2), n)
+        avg_x, avg_y = np.mean(x[next_start:next_stop]), np.mean(y[next_start:next_stop])
+        areas = [abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a])) for j in range(start, stop)]
+        a = start + int(np.argmax(areas))
+        keep.append(a)
+    keep.append(n - 1)
+    return np.array(keep)
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 3), (100, 7), (1000, 50), (5003, 1500), (2999, 1500)])
+def test_lttb_matches_reference(n, threshold):
+    rng = np.random.default_rng(n)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))
+    y = np.cumsum(rng.normal(size=n))
+    assert np.array_equal(lttb(x, y, threshold), reference_lttb(x, y, threshold))
+
+
+def test_lttb_keeps_ends_and_order():
+    y = np.sin(np.linspace(0, 20, 10_000))
+    keep = lttb(np.arange(len(y)), y, 300)
+    assert len(keep) == 300
+    assert keep[0] == 0 and keep[-1] == len(y) - 1
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_lttb_accepts_dates():
+    dates = pd.date_range("2020-01-01", periods=500, freq="h").to_numpy()
+    keep = lttb(dates, np.arange(500.0), 20)
+    assert len(keep) == 20
+
+
+def test_short_series_are_left_alone():
+    assert np.array_equal(lttb(np.arange(5), np.arange(5), 10), np.arange(5))
+    assert np.array_equal(lttb(np.arange(5), np.arange(5), 2), np.arange(5))
+    assert np.array_equal(min_max(np.arange(5), 3), np.arange(5))
+
+
+def test_min_max_keeps_spikes():
+    y = np.zeros(1000)
+    y[123], y[877] = 50, -50
+    keep = min_max(y, 10)
+    assert 123 in keep and 877 in keep
+    assert np.all(np.diff(keep) > 0)
@@ -0,0 +1,136 @@
+import os
+
+import pandas as pd
+import pytest
+
+import pipeline
+from conftest import random_baskets
+from incremental_rules import (basket_digest, build_rule_state, load_rule_state, save_rule_state,
+                               update_rule_state)
+from miner import encode_transactions, mine_rules
+
+
+def rule_supports(rules):
+    return {(a, c): s for a, c, s in zip(rules["antecedents"], rules["consequents"], rules["support"])}
+
+
+def test_update_matches_full_remine():
+    old, new = random_baskets(400, seed=1), random_baskets(150, n_items=15, seed=2)
+    old_matrix, old_items = encode_transactions(old)
+    new_matrix, new_items = encode_transactions(new)
+
+    state = build_rule_state(old_matrix, old_items, min_support=0.03)
+    state, report = update_rule_state(state, new_matrix, new_items, history=(old_matrix, old_items))
+
+    full = mine_rules(*encode_transactions(old + new), min_support=0.03)
+    updated, expected = rule_supports(report["rules"]), rule_supports(full)
+    assert updated.keys() == expected.keys()
+    for key, support in expected.items():
+        assert updated[key] == pytest.approx(support)
+    assert not report["estimated"]
+    assert state["n_baskets"] == len(old) + len(new)
+
+
+def test_update_without_history_flags_estimates():
+    old, new = random_baskets(400, seed=1), random_baskets(150, n_items=15, seed=2)
+    state = build_rule_state(*encode_transactions(old), min_support=0.03)
+    state, report = update_rule_state(state, *encode_transactions(new))
+    assert report["estimated"] == state["estimated"]
+    assert all(itemset in state["counts"] for itemset in report["estimated"])
+
+
+def test_basket_digest_survives_new_items():
+    old = random_baskets(100, seed=4)
+    new = [{"zzz new item", "aaa new item"}, {"item01"}]
+    old_matrix, old_items = encode_transactions(old)
+    all_matrix, all_items = encode_transactions(old + new)
+
+    assert basket_digest(all_matrix, all_items, len(old)) == basket_digest(old_matrix, old_items)
+    assert basket_digest(all_matrix, all_items) != basket_digest(old_matrix, old_items)
+    shuffled = encode_transactions(old[1:] + old[:1] + new)
+    assert basket_digest(*shuffled, len(old)) != basket_digest(old_matrix, old_items)
+
+
+def test_save_rule_state_round_trips(tmp_path):
+    path = tmp_path / "rules.state"
+    state = build_rule_state(*encode_transactions(random_baskets(100)), min_support=0.05)
+    save_rule_state(state, path)
+    assert load_rule_state(path)["counts"] == state["counts"]
+    assert os.listdir(tmp_path) == ["rules.state"]
+
+
+# pipeline: the rule state is only written once a run has published its artifacts
+
+def write_baskets(path, baskets):
+    width = max(len(basket) for basket in baskets)
+    rows = [sorted(basket) + [None] * (width - len(basket)) for basket in baskets]
+    pd.DataFrame(rows, columns=[f"Product_{i}" for i in range(width)]).to_csv(path, index=False)
+
+
+# run_pipeline with every step after the rules stubbed out; publish is replaced by `publish`
+@pytest.fixture
+def rules_only_pipeline(tmp_path, monkeypatch):
+    def stub(*args, **kwargs):
+        return None
+
+    for name in ("build_similarity_index", "ensure_columnar", "read_table", "fit_arima", "fit_hybrid",
+                 "load_location_sales", "load_catalog", "build_product_dimension", "build_search_index",
+                 "location_summary", "location_kpis", "monthly_panel", "forecast_panel", "load_published",
+                 "file_digest"):
+        monkeypatch.setattr(pipeline, name, stub)
+    monkeypatch.setattr(pipeline, "build_sales_cube",
+                        lambda *args: {"cube": pd.DataFrame({"Name": pd.Categorical([])})})
+
+    def run(baskets, state_path, publish):
+        write_baskets(tmp_path / pipeline.INPUT_FILES["baskets"], baskets)
+        monkeypatch.setattr(pipeline, "publish_artifacts", publish)
+        return pipeline.run_pipeline(str(tmp_path), str(tmp_path / "artifacts"), min_support=0.03,
+                                     backtest_folds=0, incremental=str(state_path))
+
+    return run
+
+
+def test_state_is_saved_after_publishing(tmp_path, rules_only_pipeline):
+    state_path = tmp_path / "rules.state"
+    published = []
+
+    def publish(artifacts, manifest, root, keep):
+        assert not state_path.exists()
+        published.append(artifacts)
+        return 1
+
+    assert rules_only_pipeline(random_baskets(200), state_path, publish) == 1
+    assert published and load_rule_state(state_path)["n_baskets"] == 200
+
+
+def test_failed_publish_leaves_state_untouched(tmp_path, rules_only_pipeline):
+    state_path = tmp_path / "rules.state"
+    baskets = random_baskets(200)
+    rules_only_pipeline(baskets, state_path, lambda *args, **kwargs: 1)
+    before = state_path.read_bytes()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        rules_only_pipeline(baskets + random_baskets(50, seed=9), state_path, fail)
+    assert state_path.read_bytes() == before
+
+    # The next successful run still reports the 50 baskets as new
+    published = []
+    rules_only_pipeline(baskets + random_baskets(50, seed=9), state_path,
+                        lambda artifacts, *args, **kwargs: published.append(artifacts) or 2)
+    assert published[0]["rule_changes"]["baskets"] == 50
+
+
+def test_rewritten_basket_file_rebuilds_state(tmp_path, rules_only_pipeline):
+    state_path = tmp_path / "rules.state"
+    baskets = random_baskets(200)
+    rules_only_pipeline(baskets, state_path, lambda *args, **kwargs: 1)
+
+    published = []
+    rewritten = random_baskets(250, seed=5)
+    rules_only_pipeline(rewritten, state_path, lambda artifacts, *args, **kwargs: published.append(artifacts) or 2)
+    assert "rule_changes" not in published[0]
+    assert rule_supports(published[0]["rules"]).keys() == \
+        rule_supports(mine_rules(*encode_transactions(rewritten), min_support=0.03)).keys()
@@ -0,0 +1,70 @@
+from itertools import combinations
+
+import pytest
+
+from conftest import random_baskets
+from miner import encode_transactions, generate_rules, mine_frequent_itemsets, mine_rules, support_to_count
+
+
+# Support of every itemset found in at least min_count baskets, by enumerating subsets
+def brute_force_counts(baskets, min_count):
+    counts = {}
+    for basket in baskets:
+        for size in range(1, len(basket) + 1):
+            for itemset in combinations(sorted(basket), size):
+                counts[frozenset(itemset)] = counts.get(frozenset(itemset), 0) + 1
+    return {itemset: count for itemset, count in counts.items() if count >= min_count}
+
+
+@pytest.mark.parametrize("min_support", [0.01, 0.05, 0.2])
+def test_eclat_matches_brute_force(baskets, min_support):
+    matrix, items = encode_transactions(baskets)
+    frequent = mine_frequent_itemsets(matrix, items, min_support=min_support)
+
+    expected = brute_force_counts(baskets, support_to_count(min_support, len(baskets)))
+    found = dict(zip(frequent["itemsets"], frequent["support"] * len(baskets)))
+    assert found.keys() == expected.keys()
+    for itemset, count in expected.items():
+        assert found[itemset] == pytest.approx(count)
+
+
+def test_max_len_limits_itemset_size(baskets):
+    matrix, items = encode_transactions(baskets)
+    frequent = mine_frequent_itemsets(matrix, items, min_support=0.01, max_len=2)
+    assert max(len(itemset) for itemset in frequent["itemsets"]) == 2
+
+
+def test_support_to_count_tolerates_float_error():
+    assert support_to_count(0.07, 100) == 7
+    assert support_to_count(0.0, 100) == 1
+
+
+def test_rule_metrics_match_brute_force():
+    baskets = random_baskets(200, seed=3)
+    n = len(baskets)
+    matrix, items = encode_transactions(baskets)
+    rules = mine_rules(matrix, items, min_support=0.02)
+    assert not rules.empty
+
+    def support(itemset):
+        return sum(itemset <= basket for basket in baskets) / n
+
+    for row in rules.itertuples(index=False):
+        antecedent, consequent = row.antecedents, row.consequents
+        both = support(antecedent | consequent)
+        assert row.support == pytest.approx(both)
+        assert row.confidence == pytest.approx(both / support(antecedent))
+        assert row.lift == pytest.approx(both / (support(antecedent) * support(consequent)))
+        assert row.lift >= 1.0
+
+
+def test_generate_rules_rejects_unknown_metric(baskets):
+    matrix, items = encode_transactions(baskets)
+    with pytest.raises(ValueError):
+        generate_rules(mine_frequent_itemsets(matrix, items, 0.05), metric="zhang")
+
+
+def test_unknown_engine_is_rejected(baskets):
+    matrix, items = encode_transactions(baskets)
+    with pytest.raises(ValueError):
+        mine_frequent_itemsets(matrix, items, engine="magic")
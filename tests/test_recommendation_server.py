@@ -0,0 +1,105 @@
+import http.client
+import json
+
+import pytest
+
+from conftest import random_baskets
+from miner import encode_transactions, mine_rules
+from recommendation_server import MAX_TOP_N, BadRequest, RecommendationService, start_server
+from rule_index import build_rule_index
+
+
+@pytest.fixture(scope="module")
+def service():
+    rules = mine_rules(*encode_transactions(random_baskets(400, n_items=200, seed=7)), min_support=0.002)
+    return RecommendationService(build_rule_index(rules))
+
+
+@pytest.fixture(scope="module")
+def server(service):
+    server = start_server(service)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    try:
+        if body is not None and not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        conn.request(method, path, body=body)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+def test_recommend(server):
+    status, payload = request(server, "GET", "/recommend?product=item00&top_n=3")
+    assert status == 200
+    assert payload["product"] == "item00" and len(payload["recommendations"]) == 3
+
+
+def test_basket_and_batch(server, service):
+    status, payload = request(server, "POST", "/recommend/basket", {"items": ["item00", "item01"], "top_n": 4})
+    assert status == 200
+    assert payload["recommendations"] == service.recommend_basket(["item00", "item01"], 4)
+
+    status, payload = request(server, "POST", "/recommend/batch",
+                              {"requests": [{"product": "item00"}, {"items": ["item01"], "top_n": 2}]})
+    assert status == 200 and len(payload["results"]) == 2
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("GET", "/recommend", None),
+    ("GET", "/recommend?product=item00&top_n=many", None),
+    ("POST", "/recommend/basket", b"{not json"),
+    ("POST", "/recommend/basket", [1, 2]),
+    ("POST", "/recommend/basket", {"items": "item00"}),
+    ("POST", "/recommend/basket", {"items": ["item00", 3]}),
+    ("POST", "/recommend/basket", {"items": ["item00"], "top_n": None}),
+    ("POST", "/recommend/batch", {"requests": {"product": "item00"}}),
+    ("POST", "/recommend/batch", {"requests": [{"product": "item00"}, "item01"]}),
+    ("POST", "/recommend/batch", {"requests": [{"product": 7}]}),
+    ("POST", "/recommend/batch", {"requests": [{"items": ["item00"], "top_n": "x"}]}),
+])
+def test_bad_requests_get_400(server, method, path, body):
+    status, payload = request(server, method, path, body)
+    assert status == 400
+    assert payload["error"]
+
+
+# JSON allows numbers int() can't convert; they used to drop the connection instead of a 400
+@pytest.mark.parametrize("top_n", [b"1e999", b"-1e999", b"Infinity", b"NaN"])
+def test_non_finite_top_n_gets_400(server, top_n):
+    status, payload = request(server, "POST", "/recommend/basket", b'{"items": ["item00"], "top_n": ' + top_n + b"}")
+    assert status == 400
+    status, payload = request(server, "GET", "/recommend?product=item00&top_n=" + top_n.decode())
+    assert status == 400
+    status, payload = request(server, "POST", "/recommend/batch",
+                              b'{"requests": [{"product": "item00", "top_n": ' + top_n + b"}]}")
+    assert status == 400
+
+
+def test_top_n_is_clamped(server, service):
+    status, payload = request(server, "GET", f"/recommend?product=item00&top_n={10 ** 12}")
+    assert status == 200
+    assert len(payload["recommendations"]) <= MAX_TOP_N
+    status, payload = request(server, "GET", "/recommend?product=item00&top_n=-5")
+    assert status == 200 and len(payload["recommendations"]) == 1
+    assert all(key[2] <= MAX_TOP_N for key in service.cache.entries)
+
+
+def test_bad_batch_entry_does_no_work(service):
+    misses = service.cache.stats()["misses"]
+    with pytest.raises(BadRequest):
+        service.batch([{"product": "item05", "top_n": 2}, {"product": None}])
+    assert service.cache.stats()["misses"] == misses
+
+
+def test_server_stays_up_and_reports_metrics(server):
+    status, payload = request(server, "GET", "/metrics")
+    assert status == 200 and payload["rules"] > 0
+    assert request(server, "GET", "/health") == (200, {"status": "ok"})
+    assert request(server, "GET", "/nowhere")[0] == 404
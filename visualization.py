@@ -3,41 +3,76 @@ def run_visualization_dashboard():
     # All your code from visualization.py goes here
 
     import streamlit as st
-    import pandas as pd
     import plotly.express as px
     import numpy as np
-
-    # Load datasets
-    df = pd.read_csv("E:/be project final/dmart_sales_with_locations.csv")
-
-    cat_df = pd.read_csv("E:/be project final/dmart cat.csv")
-
-    # Rename column for consistency
-    cat_df.rename(columns={"Categoty": "Category"}, inplace=True)
-
-    # Convert date
-    df['Date'] = pd.to_datetime(df['Date'], dayfirst=True)
-    df['Month'] = df['Date'].dt.month
+    from artifact_store import latest_version, load_published
+    from dashboard_metrics import load_catalog, load_location_sales, location_kpis
+    from product_dim import build_product_dimension
+    from sales_cube import build_sales_cube, cube_locations, members, rollup, top_members
+    from session_memo import invalidate_session_memo, session_memo
+    from downsample import downsample_frame
+    from product_search import build_search_index, name_mask, search
+
+    # Every tab is a roll-up of this cube; it comes from the latest pipeline.py run, or is
+    # built once per process from the columnar data when nothing has been published
+    @st.cache_resource
+    def load_sales_cube(version):
+        published = load_published("sales_cube", version)
+        if published is not None:
+            return published
+        return build_sales_cube(load_location_sales(), build_product_dimension(load_catalog()))
+
+    # Product search over the catalog; built on first use when nothing has been published
+    @st.cache_resource
+    def load_search_index(version):
+        published = load_published("product_search", version)
+        if published is not None:
+            return published
+        return build_search_index(build_product_dimension(load_catalog()), load_sales_cube(version)["cube"]["Name"].cat.categories)
+
+    # Every location's KPIs, computed together once per data version
+    @st.cache_resource
+    def load_location_kpis(version):
+        published = load_published("location_kpis", version)
+        if published is not None:
+            return published
+        return location_kpis(load_sales_cube(version))
+
+    # Source data changed without a new pipeline.py run: rebuild the cube and drop memoized frames
+    if st.sidebar.button("Reload data"):
+        load_sales_cube.clear()
+        load_location_kpis.clear()
+        load_search_index.clear()
+        invalidate_session_memo(st.session_state)
+
+    version = latest_version()
+    cube = load_sales_cube(version)
+
+    # Derived frames are memoized per session, keyed on the widgets they depend on, so a
+    # widget change only recomputes the tab that reads it
+    memo = session_memo(st.session_state, version)
 
     # Sidebar
     st.sidebar.title("Home")
-    selected_location = st.sidebar.selectbox("Select Location", df['Location'].unique())
-
-    # Filtered data
-    filtered_df = df[df['Location'] == selected_location].copy()
-    filtered_df['Revenue'] = filtered_df['Quantity'] * filtered_df['UnitPrice']
-
-    # Merge
-    merged_df = pd.merge(filtered_df, cat_df[['Name', 'Category', 'SubCategory', 'Brand']], on='Name', how='left')
+    selected_location = st.sidebar.selectbox("Select Location", memo.get(("locations",), lambda: cube_locations(cube)))
 
     # Summary boxes before tabs
     st.title("📊 Dmart Sales Dashboard")
 
-    # Calculate metrics
-    total_sales = int(filtered_df['Revenue'].sum())
-    total_quantity = int(filtered_df['Quantity'].sum())
-    top_category = merged_df.groupby('Category')['Revenue'].sum().idxmax()
-    top_location = filtered_df.groupby('Location')['Revenue'].sum().idxmax()
+    # Calculate metrics (read from the latest pipeline.py run when it has published them)
+    summary = memo.get(("summary",), lambda: load_published("location_summary", version))
+    if summary is not None and selected_location in summary.index:
+        total_sales = int(summary.at[selected_location, 'TotalSales'])
+        total_quantity = int(summary.at[selected_location, 'TotalQuantity'])
+        top_category = summary.at[selected_location, 'TopCategory']
+        top_location = selected_location
+    else:
+        totals = cube["location_totals"].loc[selected_location]
+        total_sales = int(totals['Revenue'])
+        total_quantity = int(totals['Quantity'])
+        top_category = memo.get(("top_category", selected_location),
+                                lambda: top_members(cube, 'Category', 'Revenue', 1, selected_location)['Category'].iat[0])
+        top_location = selected_location
 
     # Custom HTML for metrics
     box_style = """
@@ -66,8 +101,9 @@ def run_visualization_dashboard():
         st.markdown(box_style.format(icon="📍", title="Top Location", value=top_location, color="purple"), unsafe_allow_html=True)
 
     # Tabs
-    home, sales, trends, products, location, category, shipping = st.tabs([
-        "🏠 Home", "📊 Sales", "📈 Trends", "🛒 Products", "🌍 Location", "📂 Category", "🚚 Shipping"])
+    home, sales, trends, products, location, category, shipping, compare = st.tabs([
+        "🏠 Home", "📊 Sales", "📈 Trends", "🛒 Products", "🌍 Location", "📂 Category", "🚚 Shipping",
+        "🏬 Compare Stores"])
 
     # ---------------- HOME ----------------
     with home:
@@ -79,13 +115,14 @@ def run_visualization_dashboard():
         st.header("Sales Overview")
 
         st.subheader("Sales by Category")
-        category_sales = merged_df.groupby('Category')['Quantity'].sum().reset_index()
+        category_sales = memo.get(("category_sales", selected_location),
+                                  lambda: rollup(cube, 'Category', ('Quantity',), selected_location))
         fig = px.bar(category_sales, x='Category', y='Quantity', color='Category',
                     color_discrete_sequence=px.colors.qualitative.Bold, text='Quantity')
         st.plotly_chart(fig, use_container_width=True)
 
         st.subheader("Sales by Location")
-        location_sales = df.groupby('Location')['Quantity'].sum().reset_index()
+        location_sales = memo.get(("location_sales",), lambda: rollup(cube, 'Location', ('Quantity',)))
         fig = px.bar(location_sales, x='Location', y='Quantity', color='Location',
                     color_discrete_sequence=px.colors.qualitative.Vivid, text='Quantity')
         st.plotly_chart(fig, use_container_width=True)
@@ -93,8 +130,8 @@ def run_visualization_dashboard():
     # ---------------- TRENDS ----------------
     with trends:
         st.header("Monthly Sales Trends")
-        monthly_sales = filtered_df.groupby(filtered_df['Date'].dt.to_period('M'))['Quantity'].sum().reset_index()
-        monthly_sales['Date'] = monthly_sales['Date'].dt.to_timestamp()
+        monthly_sales = memo.get(("monthly_sales", selected_location),
+                                 lambda: rollup(cube, 'Month', ('Quantity',), selected_location).rename(columns={'Month': 'Date'}))
         fig = px.line(monthly_sales, x='Date', y='Quantity', title="Monthly Quantity Sold",
                     markers=True, color_discrete_sequence=["#FF6F61"])
         st.plotly_chart(fig, use_container_width=True)
@@ -103,33 +140,47 @@ def run_visualization_dashboard():
     with products:
         st.header("Product Insights")
 
-        product_list = merged_df['Name'].dropna().unique()
-        selected_product = st.selectbox("Select a Product", options=np.append(["All"], np.sort(product_list)))
+        # Only the search matches (or the location's best sellers) are sent to the browser
+        search_index = load_search_index(version)
+        sold_here = memo.get(("product_mask", selected_location),
+                             lambda: name_mask(search_index, members(cube, 'Name', selected_location)))
+        query = st.text_input("Search products (name, brand or category)", key="product_query")
+        if query:
+            options = search(search_index, query, 20, allowed=sold_here)
+        else:
+            options = memo.get(("best_sellers", selected_location),
+                               lambda: top_members(cube, 'Name', 'Quantity', 20, selected_location)['Name'].tolist())
+        selected_product = st.selectbox("Select a Product", options=["All"] + list(options))
 
         if selected_product != "All":
-            product_data = merged_df[merged_df['Name'] == selected_product]
-            total_quantity = int(product_data['Quantity'].sum())
-            total_revenue = float(product_data['Revenue'].sum())
+            product_trend = memo.get(("product_trend", selected_location, selected_product),
+                                     lambda: rollup(cube, 'Date', ('Quantity', 'Revenue'), selected_location, {'Name': selected_product}))
+            total_quantity = int(product_trend['Quantity'].sum())
+            total_revenue = float(product_trend['Revenue'].sum())
 
             st.metric("Total Quantity Sold", total_quantity)
             st.metric("Total Revenue", f"₹ {total_revenue:,.2f}")
 
-            product_trend = product_data.groupby('Date')['Quantity'].sum().reset_index()
-            fig = px.line(product_trend, x='Date', y='Quantity',
+            # Line charts get at most downsample.MAX_POINTS points, whatever the length of the history
+            trend_points = memo.get(("product_trend_points", selected_location, selected_product),
+                                    lambda: downsample_frame(product_trend, 'Date', 'Quantity'))
+            fig = px.line(trend_points, x='Date', y='Quantity',
                         title=f"Sales Trend for {selected_product}",
                         color_discrete_sequence=["#00BFFF"])
             st.plotly_chart(fig, use_container_width=True)
 
         else:
             st.subheader("Top 10 Selling Products")
-            top_products = filtered_df.groupby('Name')['Quantity'].sum().sort_values(ascending=False).head(10).reset_index()
+            top_products = memo.get(("top_products", selected_location),
+                                    lambda: top_members(cube, 'Name', 'Quantity', 10, selected_location))
             fig = px.bar(top_products, x='Quantity', y='Name', orientation='h',
                         title="Top 10 Products by Quantity",
                         color='Name', color_discrete_sequence=px.colors.qualitative.Pastel)
             st.plotly_chart(fig, use_container_width=True)
 
             st.subheader("Top 10 Revenue Products")
-            top_revenue = filtered_df.groupby('Name')['Revenue'].sum().sort_values(ascending=False).head(10).reset_index()
+            top_revenue = memo.get(("top_revenue", selected_location),
+                                   lambda: top_members(cube, 'Name', 'Revenue', 10, selected_location))
             fig = px.bar(top_revenue, x='Revenue', y='Name', orientation='h',
                         title="Top 10 Products by Revenue",
                         color='Name', color_discrete_sequence=px.colors.qualitative.Prism)
@@ -139,9 +190,9 @@ def run_visualization_dashboard():
     with location:
         st.header("Location Insights")
 
-        location_sales = df.groupby('Location')['Quantity'].sum().reset_index()
-        location_sales['lat'] = np.random.uniform(17.0, 20.0, len(location_sales))
-        location_sales['lon'] = np.random.uniform(73.0, 76.0, len(location_sales))
+        location_sales = memo.get(("location_sales",), lambda: rollup(cube, 'Location', ('Quantity',)))
+        location_sales = location_sales.assign(lat=np.random.uniform(17.0, 20.0, len(location_sales)),
+                                               lon=np.random.uniform(73.0, 76.0, len(location_sales)))
 
         fig = px.scatter_mapbox(location_sales, lat='lat', lon='lon', size='Quantity', color='Location',
                                 color_discrete_sequence=px.colors.qualitative.Safe,
@@ -152,19 +203,21 @@ def run_visualization_dashboard():
     with category:
         st.header("Category-Level Analysis")
 
-        category_list = merged_df['Category'].dropna().unique()
-        selected_cat = st.selectbox("Select a Category", options=np.append(["All"], np.sort(category_list)))
+        category_list = memo.get(("category_list", selected_location), lambda: members(cube, 'Category', selected_location))
+        selected_cat = st.selectbox("Select a Category", options=np.append(["All"], category_list))
 
         if selected_cat != "All":
-            cat_data = merged_df[merged_df['Category'] == selected_cat]
+            in_category = {'Category': selected_cat}
 
             st.subheader(f"Revenue Breakdown for '{selected_cat}'")
-            subcat = cat_data.groupby('SubCategory')['Revenue'].sum().reset_index()
+            subcat = memo.get(("subcategory_revenue", selected_location, selected_cat),
+                              lambda: rollup(cube, 'SubCategory', ('Revenue',), selected_location, in_category))
             fig = px.pie(subcat, names='SubCategory', values='Revenue',
                         color_discrete_sequence=px.colors.sequential.Rainbow)
             st.plotly_chart(fig, use_container_width=True)
 
-            top_cat_prods = cat_data.groupby('Name')['Revenue'].sum().sort_values(ascending=False).head(10).reset_index()
+            top_cat_prods = memo.get(("top_category_products", selected_location, selected_cat),
+                                     lambda: top_members(cube, 'Name', 'Revenue', 10, selected_location, in_category))
             st.subheader("Top 10 Products in this Category")
             fig = px.bar(top_cat_prods, x='Revenue', y='Name', orientation='h',
                         color='Name', color_discrete_sequence=px.colors.qualitative.Alphabet)
@@ -172,13 +225,15 @@ def run_visualization_dashboard():
 
         else:
             st.subheader("Revenue by Category")
-            cat_rev = merged_df.groupby('Category')['Revenue'].sum().reset_index()
+            cat_rev = memo.get(("category_revenue", selected_location),
+                               lambda: rollup(cube, 'Category', ('Revenue',), selected_location))
             fig = px.bar(cat_rev, x='Revenue', y='Category', orientation='h',
                         color='Category', color_discrete_sequence=px.colors.qualitative.Set1)
             st.plotly_chart(fig, use_container_width=True)
 
             st.subheader("SubCategory Performance")
-            subcat = merged_df.groupby('SubCategory')['Revenue'].sum().reset_index()
+            subcat = memo.get(("subcategory_revenue", selected_location, "All"),
+                              lambda: rollup(cube, 'SubCategory', ('Revenue',), selected_location))
             fig = px.pie(subcat, names='SubCategory', values='Revenue',
                         color_discrete_sequence=px.colors.sequential.Viridis)
             st.plotly_chart(fig, use_container_width=True)
@@ -187,17 +242,57 @@ def run_visualization_dashboard():
     with shipping:
         st.header("Order & Shipping Overview")
 
-        daily = filtered_df.groupby('Date').agg({'Quantity': 'sum', 'UnitPrice': 'mean'}).reset_index()
+        daily = memo.get(("daily", selected_location), lambda: rollup(cube, 'Date', ('Quantity', 'UnitPrice'), selected_location))
+        daily_quantity = memo.get(("daily_quantity_points", selected_location),
+                                  lambda: downsample_frame(daily[['Date', 'Quantity']], 'Date', 'Quantity'))
+        daily_price = memo.get(("daily_price_points", selected_location),
+                               lambda: downsample_frame(daily[['Date', 'UnitPrice']], 'Date', 'UnitPrice'))
 
         st.subheader("Orders Over Time")
-        fig = px.line(daily, x='Date', y='Quantity',
+        fig = px.line(daily_quantity, x='Date', y='Quantity',
                     title="Daily Order Quantities",
                     color_discrete_sequence=["#4CAF50"])
         st.plotly_chart(fig, use_container_width=True)
 
         st.subheader("Average Unit Price Over Time")
-        fig = px.line(daily, x='Date', y='UnitPrice',
+        fig = px.line(daily_price, x='Date', y='UnitPrice',
                     title="Daily Avg Unit Price",
                     color_discrete_sequence=["#FF69B4"])
         st.plotly_chart(fig, use_container_width=True)
 
+    # ---------------- COMPARE STORES ----------------
+    with compare:
+        st.header("Store Comparison")
+        kpis = load_location_kpis(version)
+        ranking = kpis["summary"]
+
+        st.subheader("Store Ranking")
+        st.dataframe(
+            ranking[['Rank', 'TotalSales', 'TotalQuantity', 'Orders', 'RevenueShare', 'LastMonthGrowth', 'TopCategory']]
+            .style.format({'TotalSales': '₹ {:,}', 'TotalQuantity': '{:,}', 'Orders': '{:,}',
+                           'RevenueShare': '{:.1%}', 'LastMonthGrowth': '{:+.1%}'}),
+            use_container_width=True,
+        )
+
+        stores = list(ranking.index)
+        chosen = st.multiselect("Stores to compare", options=stores, default=stores[:min(3, len(stores))])
+
+        if chosen:
+            columns = st.columns(len(chosen))
+            for column, store in zip(columns, chosen):
+                row = ranking.loc[store]
+                with column:
+                    st.markdown(f"**#{row['Rank']} {store}**")
+                    st.metric("Total Sales", f"₹ {row['TotalSales']:,}")
+                    st.metric("Quantity Sold", f"{row['TotalQuantity']:,}")
+                    st.metric("Top Category", row['TopCategory'])
+
+            monthly = kpis["monthly"]
+            fig = px.line(monthly[monthly['Location'].isin(chosen)], x='Month', y='Revenue', color='Location',
+                        title="Monthly Revenue by Store", markers=True)
+            st.plotly_chart(fig, use_container_width=True)
+
+            top = kpis["top_products"]
+            fig = px.bar(top[top['Location'].isin(chosen)], x='Revenue', y='Name', color='Location',
+                        orientation='h', barmode='group', title="Top Products by Store")
+            st.plotly_chart(fig, use_container_width=True)